@@ -1,2 +1,3 @@
 from .paper import Paper
-from .organizer import Organizer
\ No newline at end of file
+from .organizer import Organizer
+from .instrument import instrumentation
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import random
+from typing import Optional
+
+from ..CONSTANT import safe_categories
+
+
+venues = ['NeurIPS', 'ICML', 'ICLR', 'ACL', 'EMNLP', 'CVPR', 'ICCV', 'AAAI', 'IJCAI', 'KDD']
+relation_types = ['cites', 'extends', 'related', 'compares']
+
+
+class SyntheticCollection():
+    # what generate_collection wrote, with the data that populate() applies once papers are registered
+
+    def __init__(self, collection_loc: str, size: int) -> None:
+        self.collection_loc: str = collection_loc
+        self.size: int = size
+        self.bibtex: dict[int, str] = {}
+        self.keywords: dict[int, list[str]] = {}
+        self.relations: list[list[int | list[int] | bool | str]] = []
+        self.categories: dict[int, str] = {}
+        self.keys: list[str] = []
+        self.all_keywords: list[str] = []
+
+
+def make_bibtex(paper_id: int, rng: random.Random) -> str:
+    year = rng.randint(1995, 2025)
+    if rng.random() < 0.6:
+        return (f'@inproceedings{{paper{paper_id},\n'
+                f'  author = {{Author {rng.randint(1, 5000)} and Author {rng.randint(1, 5000)}}},\n'
+                f'  title = {{Synthetic {{Paper}} number {paper_id}}},\n'
+                f'  booktitle = {{{rng.choice(venues)}}},\n'
+                f'  year = {{{year}}},\n'
+                f'  pages = {{{rng.randint(1, 500)}--{rng.randint(501, 900)}}}\n'
+                f'}}')
+    return (f'@article{{paper{paper_id},\n'
+            f'  author = {{Author {rng.randint(1, 5000)}}},\n'
+            f'  title = {{Synthetic Paper number {paper_id}}},\n'
+            f'  journal = {{Journal of {rng.choice(venues)}}},\n'
+            f'  year = {{{year}}},\n'
+            f'  volume = {{{rng.randint(1, 60)}}}\n'
+            f'}}')
+
+
+def generate_collection(collection_loc: str,
+                        size: int,
+                        registered: bool = False,
+                        keywords_per_paper: int = 3,
+                        keyword_pool: int = 200,
+                        relations_per_paper: int = 2,
+                        notes_per_paper: int = 2,
+                        seed: Optional[int] = 0) -> SyntheticCollection:
+    # unregistered pdfs are named so that auto_add_papers gives paper_<i>.pdf the id i
+    rng = random.Random(seed)
+    papers_loc = os.path.join(collection_loc, 'papers')
+    notes_loc = os.path.join(collection_loc, 'notes')
+    os.makedirs(papers_loc, exist_ok=True)
+    os.makedirs(notes_loc, exist_ok=True)
+
+    collection = SyntheticCollection(collection_loc, size)
+    collection.all_keywords = [f'keyword{i}' for i in range(keyword_pool)]
+    width = len(str(size))
+    for paper_id in range(1, size + 1):
+        pdf_name = f'{paper_id}_registered.pdf' if registered else f'paper_{paper_id:0{width}d}.pdf'
+        with open(os.path.join(papers_loc, pdf_name), 'wb') as file:
+            # distinct content, otherwise registration rejects every pdf after the first as a duplicate
+            file.write(f'%PDF-1.4\n% synthetic paper {paper_id}\n%%EOF\n'.encode())
+        with open(os.path.join(notes_loc, f'{paper_id}.txt'), 'w') as file:
+            for i in range(notes_per_paper):
+                file.write(f'Synthetic note {i} on paper {paper_id}.\n')
+                file.write("THIS IS A SPLIT LINE\n")
+
+        collection.bibtex[paper_id] = make_bibtex(paper_id, rng)
+        collection.keys.append(f'paper{paper_id}')
+        collection.keywords[paper_id] = rng.sample(collection.all_keywords, min(keywords_per_paper, keyword_pool))
+        if rng.random() < 0.1:
+            collection.categories[paper_id] = rng.choice(safe_categories)
+        if size > 1:
+            targets = sorted({rng.randint(1, size) for _ in range(relations_per_paper)} - {paper_id})
+            if targets != []:
+                collection.relations.append([paper_id, targets, rng.random() < 0.3, rng.choice(relation_types), f'note {paper_id}'])
+    return collection
+
+
+def populate(organizer, collection: SyntheticCollection) -> None:
+    # apply bibtex, keywords, categories and relations to the registered papers
+    for paper_id, bibtex in collection.bibtex.items():
+        organizer.set_paper_bibtex(paper_id, bibtex)
+    for paper_id, keywords in collection.keywords.items():
+        organizer.add_keyword(paper_id, keywords)
+    for paper_id, category in collection.categories.items():
+        organizer.add_category(paper_id, category)
+    organizer.add_relation(collection.relations)
@@ -0,0 +1,98 @@
+import argparse
+import gc
+import tracemalloc
+
+from ..paper import Paper
+
+
+class DictPaper():
+    # the previous layout: attributes in a per-instance __dict__ and a set of active attribute names
+
+    def __init__(self, paper_id: int) -> None:
+        self.paper_loc = f'collection/papers/{paper_id}_registered.pdf'
+        self.datasave_loc = f'collection/data/{paper_id}.csv'
+        self.notes_loc = f'collection/notes/{paper_id}.txt'
+        self.paper_id = paper_id
+        self.title = None
+        self.bibtex = None
+        self.active_attrs = set(['paper_id'])
+        self.category = None
+        self.keywords = []
+        self.relations = []
+        self.notes = []
+
+    def load_records(self, records: list[tuple[str, str]]) -> None:
+        for attr, info in records:
+            if attr == 'keywords':
+                self.keywords = info.split(',')
+            elif attr == 'relations':
+                splits = info.split('_')
+                self.relations.append([splits[0], splits[1], '_'.join(splits[2:])])
+            elif attr != 'paper_id':
+                setattr(self, attr, info)
+            self.active_attrs.add(attr)
+
+
+def slot_paper(paper_id: int) -> Paper:
+    # bypasses Paper.__init__, which needs the pdf and notes files on disk
+    paper = Paper.__new__(Paper)
+    paper.paper_loc = f'collection/papers/{paper_id}_registered.pdf'
+    paper.notes_loc = f'collection/notes/{paper_id}.txt'
+    paper.paper_id = paper_id
+    paper.key_index = None
+    paper.notes_cache = None
+    paper.title = None
+    paper.bibtex = None
+    paper.active_attrs = ['paper_id']
+    paper.category = None
+    paper.keywords = []
+    paper.relations = []
+    paper.notes = []
+    return paper
+
+
+def make_records(paper_id: int) -> list[tuple[str, str]]:
+    return [
+        ('bibtex', f'@article{{key{paper_id}, author={{Author {paper_id % 997}}}, title={{Title {paper_id}}}, year={{{2000 + paper_id % 25}}}}}'),
+        ('entry', 'article'),
+        ('key', f'key{paper_id}'),
+        ('author', f'Author {paper_id % 997}'),
+        ('title', f'Title {paper_id}'),
+        ('year', str(2000 + paper_id % 25)),
+        ('journal', f'Journal {paper_id % 50}'),
+        ('keywords', ','.join(f'keyword{(paper_id + i) % 200}' for i in range(3))),
+        ('relations', f'{(paper_id + 1)}_cites_'),
+        ('relations', f'{(paper_id + 2)}_BE related_'),
+    ]
+
+
+def measure(factory, size: int) -> int:
+    # the records are built before tracing starts so only the paper objects are counted
+    records = [make_records(paper_id) for paper_id in range(1, size + 1)]
+    gc.collect()
+    tracemalloc.start()
+    papers = []
+    for paper_id, rows in zip(range(1, size + 1), records):
+        paper = factory(paper_id)
+        paper.load_records(rows)
+        papers.append(paper)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del papers
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Memory used by Paper objects against catalog size.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f'{"papers":>9} {"dict (MB)":>10} {"slots (MB)":>11} {"saving":>7}')
+    for size in args.sizes:
+        dict_bytes = measure(DictPaper, size)
+        slot_bytes = measure(slot_paper, size)
+        print(f'{size:>9} {dict_bytes / 2**20:>10.1f} {slot_bytes / 2**20:>11.1f} {1 - slot_bytes / dict_bytes:>7.1%}')
+
+
+if __name__ == '__main__':
+    main()
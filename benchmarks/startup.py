@@ -0,0 +1,59 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from ..organizer import Organizer
+from .generator import generate_collection
+
+
+def cold_start(collection_loc: str, lazy: bool) -> float:
+    start = time.perf_counter()
+    organizer = Organizer(collection_loc, lazy=lazy)
+    organizer.auto_add_papers(summary=False)
+    organizer.data_load()
+    elapsed = time.perf_counter() - start
+    organizer.store.close()
+    return elapsed
+
+
+def snapshot_start(collection_loc: str) -> float:
+    organizer = Organizer.open(collection_loc, lazy=True, summary=False)
+    organizer.store.close()
+    start = time.perf_counter()
+    organizer = Organizer.open(collection_loc, lazy=True, summary=False)
+    elapsed = time.perf_counter() - start
+    organizer.store.close()
+    return elapsed
+
+
+def listing(collection_loc: str) -> float:
+    start = time.perf_counter()
+    with os.scandir(os.path.join(collection_loc, 'papers')) as entries:
+        for _ in entries:
+            pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Cold-start time of an Organizer against collection size.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f'{"papers":>8} {"listing (s)":>12} {"eager (s)":>10} {"lazy (s)":>10} {"snapshot (s)":>13}')
+    for size in args.sizes:
+        collection_loc = tempfile.mkdtemp(prefix='paper_organizer_bench_')
+        try:
+            generate_collection(collection_loc, size, registered=True)
+            listing_time = listing(collection_loc)
+            lazy_time = cold_start(collection_loc, lazy=True)
+            eager_time = cold_start(collection_loc, lazy=False)
+            snapshot_time = snapshot_start(collection_loc)
+        finally:
+            shutil.rmtree(collection_loc)
+        print(f'{size:>8} {listing_time:>12.4f} {eager_time:>10.4f} {lazy_time:>10.4f} {snapshot_time:>13.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+from ..organizer import Organizer
+from .generator import generate_collection, populate
+
+
+class Timer():
+
+    def __init__(self) -> None:
+        self.results: list[dict] = []
+
+    @contextlib.contextmanager
+    def measure(self, size: int, operation: str, calls: int = 1):
+        # stdout is silenced so that the organizer's own printing is not what gets measured
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - start
+        self.results.append({'size': size, 'operation': operation, 'calls': calls,
+                             'seconds': seconds, 'seconds_per_call': seconds / calls if calls else 0.0})
+
+
+def run_size(timer: Timer, size: int, store: str, queries: int, seed: int) -> None:
+    collection_loc = tempfile.mkdtemp(prefix='paper_organizer_bench_')
+    try:
+        collection = generate_collection(collection_loc, size, seed=seed)
+        organizer = Organizer(collection_loc, store=store)
+
+        # register a few pdfs one by one, then the rest in one scan
+        pdf_names = sorted(os.listdir(organizer.papers_loc))
+        single = pdf_names[:min(100, size)]
+        with timer.measure(size, 'add_paper', len(single)):
+            for pdf_name in single:
+                organizer.add_paper(pdf_name, False)
+        with timer.measure(size, 'auto_add_papers'):
+            organizer.auto_add_papers()
+
+        with timer.measure(size, 'set_paper_bibtex', size):
+            for paper_id, bibtex in collection.bibtex.items():
+                organizer.set_paper_bibtex(paper_id, bibtex)
+        collection.bibtex = {}
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            populate(organizer, collection)
+
+        with timer.measure(size, 'data_save'):
+            organizer.data_save(full=True)
+        organizer.store.close()
+
+        organizer = Organizer(collection_loc, store=store)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            organizer.auto_add_papers()
+        with timer.measure(size, 'data_load'):
+            organizer.data_load()
+
+        rng = random.Random(seed)
+        keywords = [rng.choice(collection.all_keywords) for _ in range(queries)]
+        with timer.measure(size, 'search_keyword', queries):
+            for keyword in keywords:
+                organizer.search_keyword(keyword)
+        keys = [rng.choice(collection.keys) for _ in range(queries)]
+        with timer.measure(size, 'get_name_from_citation_key', 1):
+            organizer.get_name_from_citation_key(keys)
+        with timer.measure(size, 'get_citation_bib'):
+            organizer.get_citation_bib()
+        with timer.measure(size, 'print_info'):
+            organizer.print_info()
+
+        with timer.measure(size, 'catalog_frame'):
+            organizer.catalog_frame()
+        years = [rng.randint(1990, 2024) for _ in range(queries)]
+        with timer.measure(size, 'query_catalog', queries):
+            for year, keyword in zip(years, keywords):
+                organizer.query_catalog(entry='inproceedings', year_from=year, author='author 1', keywords=keyword)
+        with timer.measure(size, 'count_catalog'):
+            organizer.count_catalog('year')
+        organizer.store.close()
+    finally:
+        shutil.rmtree(collection_loc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Time the Organizer hot paths on synthetic collections.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--store', default='sqlite', choices=['sqlite', 'csv'])
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+
+    timer = Timer()
+    for size in args.sizes:
+        run_size(timer, size, args.store, args.queries, args.seed)
+        for result in timer.results:
+            if result['size'] == size:
+                print(f"{size:>8} {result['operation']:<28} {result['seconds']:>10.4f}s {result['calls']:>7} calls")
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'store': args.store,
+        'results': timer.results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import re
+from typing import Iterable, Iterator, Optional
+
+from .CONSTANT import possible_entries, required_fields, optional_fields
+from .instrument import instrumented
+
+
+# compiled once at import, shared by every Paper and by the bulk importer
+brace_pattern = re.compile(r'[{}]')
+entry_start_pattern = re.compile(r'@\s*\w+\s*\{')
+head_pattern = re.compile(r'\s*@\s*(?P<entry_type>\w+)\s*\{\s*(?P<key>[^,\s{}]*)\s*,')
+field_name_pattern = re.compile(r'[\s,]*(?P<field>[^\s=,{}"#]+)\s*=\s*')
+bare_value_pattern = re.compile(r'[^\s,{}"#]+')
+space_pattern = re.compile(r'\s+')
+title_pattern = re.compile(r'[^0-9a-z]+')
+
+skipped_entries = ['comment', 'preamble', 'string']
+
+
+def iter_bib_entries(lines: Iterable[str]) -> Iterator[str]:
+    # split a .bib stream into raw `@type{...}` entries by brace depth, one line at a time
+    buffer: list[str] = []
+    depth = 0
+    opened = False
+    for line in lines:
+        position = 0
+        while position < len(line):
+            if buffer == []:
+                start = entry_start_pattern.search(line, position)
+                if start is None:
+                    break
+                position = start.start()
+            end = None
+            for match in brace_pattern.finditer(line, position):
+                if match.group() == '{':
+                    depth += 1
+                    opened = True
+                else:
+                    depth -= 1
+                    if opened and depth == 0:
+                        end = match.end()
+                        break
+            if end is None:
+                buffer.append(line[position:])
+                break
+            buffer.append(line[position:end])
+            yield ''.join(buffer)
+            buffer = []
+            opened = False
+            position = end
+    if buffer != [] and ''.join(buffer).strip() != '':
+        yield ''.join(buffer)
+
+
+def _read_braced(text: str, position: int) -> tuple[str, int]:
+    # text[position] is '{', returns the content up to the matching '}' with inner braces kept
+    depth = 0
+    for match in brace_pattern.finditer(text, position):
+        if match.group() == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[position + 1:match.start()], match.end()
+    raise ValueError('Unbalanced braces in bibtex.')
+
+
+def _read_quoted(text: str, position: int) -> tuple[str, int]:
+    # text[position] is '"', quotes inside braces do not end the value
+    depth = 0
+    for index in range(position + 1, len(text)):
+        char = text[index]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif char == '"' and depth == 0:
+            return text[position + 1:index], index + 1
+    raise ValueError('Unterminated quoted value in bibtex.')
+
+
+@instrumented('parse_bibtex')
+def parse_entry(bibtex: str) -> dict[str, str]:
+    head = head_pattern.match(bibtex)
+    if head is None:
+        raise ValueError('The bibtex does not start with an `@type{key,` header.')
+    entry = {'entry_type': head.group('entry_type').lower(), 'key': head.group('key')}
+
+    position = head.end()
+    while True:
+        match = field_name_pattern.match(bibtex, position)
+        if match is None:
+            break
+        field = match.group('field').lower()
+        position = match.end()
+        parts = []
+        while True:
+            if position >= len(bibtex):
+                raise ValueError(f'The value of {field} is missing in bibtex.')
+            char = bibtex[position]
+            if char == '{':
+                part, position = _read_braced(bibtex, position)
+            elif char == '"':
+                part, position = _read_quoted(bibtex, position)
+            else:
+                bare = bare_value_pattern.match(bibtex, position)
+                if bare is None:
+                    raise ValueError(f'The value of {field} is missing in bibtex.')
+                part, position = bare.group(), bare.end()
+            parts.append(part)
+            # `#` concatenates values
+            while position < len(bibtex) and bibtex[position].isspace():
+                position += 1
+            if position < len(bibtex) and bibtex[position] == '#':
+                position += 1
+                while position < len(bibtex) and bibtex[position].isspace():
+                    position += 1
+            else:
+                break
+        entry[field] = space_pattern.sub(' ', ''.join(parts)).strip()
+
+    if bibtex[position:].strip(' \t\r\n,') not in ['}', '']:
+        raise ValueError(f'Unexpected text in bibtex: {bibtex[position:].strip()[:40]}')
+    return entry
+
+
+def validate_entry(entry: dict[str, str]) -> list[str]:
+    errors = []
+    entry_type = entry['entry_type']
+    if entry_type not in possible_entries:
+        return [f"{entry_type} is not a valid entry type in bibtex."]
+    if entry['key'] == '':
+        errors.append('The citation key is empty.')
+    for field in entry:
+        if field not in ['entry_type', 'key'] and field not in required_fields[entry_type] and field not in optional_fields[entry_type]:
+            errors.append(f"{field} is not a valid field type in bibtex.")
+    remaining_required_fields = set(required_fields[entry_type]) - set(entry)
+    if remaining_required_fields != set():
+        errors.append(f"{remaining_required_fields} is not included in the bibtex.")
+    return errors
+
+
+def parse_and_validate(bibtex: str) -> tuple[Optional[dict[str, str]], list[str]]:
+    # top level so that it can be shipped to a process pool
+    try:
+        entry = parse_entry(bibtex)
+    except ValueError as error:
+        return None, [str(error)]
+    return entry, validate_entry(entry)
+
+
+def normalize_title(title: str) -> str:
+    return title_pattern.sub(' ', title.replace('{', '').replace('}', '').lower()).strip()
+
+
+class BibImportReport():
+
+    def __init__(self) -> None:
+        self.imported: dict[str, int] = {}
+        self.skipped: dict[str, int] = {}
+        self.unmatched: list[str] = []
+        self.errors: dict[str, list[str]] = {}
+
+    def __str__(self) -> str:
+        info = f'Imported {len(self.imported)} entries, skipped {len(self.skipped)} papers that already have a bibtex, '
+        info += f'{len(self.unmatched)} entries matched no paper, {len(self.errors)} entries have errors.\n'
+        for key, errors in self.errors.items():
+            info += f'{key}: {"; ".join(errors)}\n'
+        return info
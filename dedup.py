@@ -0,0 +1,120 @@
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from .bibtex import normalize_title
+from .instrument import instrumentation
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    read = 0
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            read += len(chunk)
+    instrumentation.record_io(opened=1, read=read)
+    return digest.hexdigest()
+
+
+def author_surname(author: str) -> str:
+    first = author.split(' and ')[0].strip()
+    surname = first.split(',')[0] if ',' in first else (first.split() or [''])[-1]
+    return normalize_title(surname)
+
+
+def fingerprint(title: Optional[str], author: Optional[str] = None, year: Optional[str] = None) -> Optional[str]:
+    # cheap near-duplicate key: normalized title, first author surname and year
+    if title is None:
+        return None
+    parts = [normalize_title(title)]
+    parts.append(author_surname(author) if author is not None else '')
+    parts.append(str(year).strip() if year is not None else '')
+    return '|'.join(parts)
+
+
+class HashIndex():
+    # content digests of the files under papers/, keyed by file name and trusted while size and mtime match;
+    # `links` records pdfs that were recognised as copies of a registered paper.
+    # `sizes` maps a file size to the registered pdfs of that size, so a new pdf is only compared with
+    # files it could be a copy of; the organizer fills it once per process (synced) and then keeps it current
+
+    def __init__(self, index_loc: str) -> None:
+        self.index_loc: str = index_loc
+        self.conn = sqlite3.connect(self.index_loc, check_same_thread=False)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'name TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS links (name TEXT PRIMARY KEY, paper_id INTEGER NOT NULL);'
+        )
+        self.conn.commit()
+        self.linked: dict[str, int] = dict(self.conn.execute('SELECT name, paper_id FROM links'))
+        self.sizes: dict[int, set[str]] = {}
+        self.file_sizes: dict[str, int] = {}
+        self.synced: bool = False
+
+    def track(self, file_sizes: dict[str, int]) -> None:
+        for name, size in file_sizes.items():
+            self.untrack([name])
+            self.file_sizes[name] = size
+            self.sizes.setdefault(size, set()).add(name)
+
+    def untrack(self, names: Iterable[str]) -> None:
+        for name in names:
+            size = self.file_sizes.pop(name, None)
+            if size is not None:
+                self.sizes[size].discard(name)
+                if self.sizes[size] == set():
+                    del self.sizes[size]
+
+    def names_with_size(self, size: int) -> set[str]:
+        return set(self.sizes.get(size, ()))
+
+    def digests(self, files: dict[str, tuple[str, int, int]], workers: Optional[int] = None) -> dict[str, str]:
+        # files maps name -> (path, size, mtime_ns); only new or changed files are read
+        digests = {}
+        stale = []
+        for name, (path, size, mtime_ns) in files.items():
+            row = self.conn.execute('SELECT size, mtime_ns, digest FROM files WHERE name = ?', (name,)).fetchone()
+            if row is not None and row[0] == size and row[1] == mtime_ns:
+                digests[name] = row[2]
+            else:
+                stale.append(name)
+        if len(stale) > 1 and workers != 1:
+            # hashlib releases the GIL on large buffers, so threads hash in parallel
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                computed = list(executor.map(lambda name: file_digest(files[name][0]), stale))
+        else:
+            computed = [file_digest(files[name][0]) for name in stale]
+        with self.conn:
+            for name, digest in zip(stale, computed):
+                _, size, mtime_ns = files[name]
+                self.conn.execute('INSERT OR REPLACE INTO files (name, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                                  (name, size, mtime_ns, digest))
+                digests[name] = digest
+        return digests
+
+    def rename(self, renames: dict[str, str]) -> None:
+        for old_name, new_name in renames.items():
+            size = self.file_sizes.get(old_name)
+            if size is not None:
+                self.untrack([old_name])
+                self.track({new_name: size})
+        with self.conn:
+            self.conn.executemany('UPDATE OR REPLACE files SET name = ? WHERE name = ?',
+                                  [(new_name, old_name) for old_name, new_name in renames.items()])
+
+    def links(self) -> dict[str, int]:
+        return dict(self.linked)
+
+    def link(self, links: dict[str, int]) -> None:
+        self.linked.update(links)
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO links (name, paper_id) VALUES (?, ?)', list(links.items()))
+
+    def close(self) -> None:
+        self.conn.close()
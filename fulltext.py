@@ -0,0 +1,129 @@
+import heapq
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+token_pattern = re.compile(r'[a-z0-9]+')
+stop_words = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is', 'it', 'its',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'we', 'were', 'which', 'with',
+])
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in token_pattern.findall(text.lower()) if len(token) > 1 and token not in stop_words]
+
+
+def extract_text(pdf_loc: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError('Full-text search needs the pypdf package. Install it with `pip install pypdf`.')
+    reader = PdfReader(pdf_loc)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def index_document(task: tuple[int, str]) -> tuple[int, dict[str, int], Optional[str]]:
+    # top level so that it can be shipped to a process pool
+    paper_id, pdf_loc = task
+    try:
+        terms = Counter(tokenize(extract_text(pdf_loc)))
+    except ImportError:
+        raise
+    except Exception as error:
+        return paper_id, {}, f'{type(error).__name__}: {error}'
+    return paper_id, dict(terms), None
+
+
+class FullTextIndex():
+    # on-disk inverted index (term -> paper id, term frequency) with BM25 ranking
+
+    def __init__(self, index_loc: str, k1: float = 1.2, b: float = 0.75) -> None:
+        self.index_loc: str = index_loc
+        self.k1: float = k1
+        self.b: float = b
+        self.conn = sqlite3.connect(self.index_loc)
+        self.conn.executescript(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            'paper_id INTEGER PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, length INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS postings ('
+            'term TEXT NOT NULL, paper_id INTEGER NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, paper_id)) WITHOUT ROWID;'
+            'CREATE INDEX IF NOT EXISTS postings_paper ON postings (paper_id);'
+            # pdfs whose text could not be extracted, with the size and mtime they failed at
+            'CREATE TABLE IF NOT EXISTS failures ('
+            'paper_id INTEGER PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, error TEXT NOT NULL);'
+        )
+        self.conn.commit()
+        self._lengths: Optional[dict[int, int]] = None
+
+    def _doc_lengths(self) -> dict[int, int]:
+        if self._lengths is None:
+            self._lengths = dict(self.conn.execute('SELECT paper_id, length FROM documents'))
+        return self._lengths
+
+    def update(self, pdf_locs: dict[int, str], workers: Optional[int] = None) -> dict[str, list]:
+        # re-index only pdfs whose size or mtime changed, drop papers that are gone; a pdf that failed
+        # to extract is retried only once the file changes
+        indexed = {paper_id: (size, mtime_ns) for paper_id, size, mtime_ns in self.conn.execute('SELECT paper_id, size, mtime_ns FROM documents')}
+        indexed.update({paper_id: (size, mtime_ns) for paper_id, size, mtime_ns in self.conn.execute('SELECT paper_id, size, mtime_ns FROM failures')})
+        tasks = []
+        stats = {}
+        for paper_id, pdf_loc in pdf_locs.items():
+            stat = os.stat(pdf_loc)
+            stats[paper_id] = (stat.st_size, stat.st_mtime_ns)
+            if indexed.get(paper_id) != stats[paper_id]:
+                tasks.append((paper_id, pdf_loc))
+        removed = [paper_id for paper_id in indexed if paper_id not in pdf_locs]
+
+        if workers is not None and workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(index_document, tasks, chunksize=8))
+        else:
+            results = [index_document(task) for task in tasks]
+
+        report: dict[str, list] = {'indexed': [], 'removed': removed, 'failed': []}
+        with self.conn:
+            stale = removed + [paper_id for paper_id, _, _ in results]
+            self.conn.executemany('DELETE FROM postings WHERE paper_id = ?', [(paper_id,) for paper_id in stale])
+            self.conn.executemany('DELETE FROM documents WHERE paper_id = ?', [(paper_id,) for paper_id in stale])
+            self.conn.executemany('DELETE FROM failures WHERE paper_id = ?', [(paper_id,) for paper_id in stale])
+            for paper_id, terms, error in results:
+                size, mtime_ns = stats[paper_id]
+                if error is not None:
+                    # kept out of documents so it never ranks, remembered so an unchanged file is not extracted again
+                    self.conn.execute('INSERT INTO failures (paper_id, size, mtime_ns, error) VALUES (?, ?, ?, ?)',
+                                      (paper_id, size, mtime_ns, error))
+                    report['failed'].append((paper_id, error))
+                    continue
+                self.conn.execute('INSERT INTO documents (paper_id, size, mtime_ns, length) VALUES (?, ?, ?, ?)',
+                                  (paper_id, size, mtime_ns, sum(terms.values())))
+                self.conn.executemany('INSERT INTO postings (term, paper_id, tf) VALUES (?, ?, ?)',
+                                      [(term, paper_id, tf) for term, tf in terms.items()])
+                report['indexed'].append(paper_id)
+        self._lengths = None
+        return report
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[int, float]]:
+        lengths = self._doc_lengths()
+        if lengths == {}:
+            return []
+        doc_count = len(lengths)
+        average_length = sum(lengths.values()) / doc_count or 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.conn.execute('SELECT paper_id, tf FROM postings WHERE term = ?', (term,)).fetchall()
+            if postings == []:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for paper_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * lengths[paper_id] / average_length)
+                scores[paper_id] = scores.get(paper_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,182 @@
+import heapq
+from typing import Iterator, Optional
+
+
+class RelationGraph():
+    # typed, directed relations between paper ids. A mutual relation is two edges; the
+    # reverse side of a one-way relation is read from `incoming` rather than stored as 'BE <type>'
+
+    def __init__(self) -> None:
+        self.outgoing: dict[int, dict[str, set[int]]] = {}
+        self.incoming: dict[int, dict[str, set[int]]] = {}
+        # every distinct note of a typed edge, the same two papers can be related the same way more than once
+        self.notes: dict[tuple[int, int, str], list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def has_edge(self, source: int, target: int, relation_type: str, note: Optional[str] = None) -> bool:
+        # with a note given, only true when the edge already carries that note
+        notes = self.notes.get((source, target, relation_type))
+        return notes is not None and (note is None or note in notes)
+
+    def add_edge(self, source: int, target: int, relation_type: str, note: str = '') -> bool:
+        # returns False when the edge already carries this note
+        notes = self.notes.get((source, target, relation_type))
+        if notes is None:
+            self.outgoing.setdefault(source, {}).setdefault(relation_type, set()).add(target)
+            self.incoming.setdefault(target, {}).setdefault(relation_type, set()).add(source)
+            self.notes[(source, target, relation_type)] = [note]
+            return True
+        if note in notes:
+            return False
+        notes.append(note)
+        return True
+
+    def remove_edge(self, source: int, target: int, relation_type: str) -> None:
+        if self.notes.pop((source, target, relation_type), None) is None:
+            return
+        self._discard(self.outgoing, source, relation_type, target)
+        self._discard(self.incoming, target, relation_type, source)
+
+    def remove_outgoing(self, paper_id: int) -> None:
+        for relation_type, targets in list(self.outgoing.get(paper_id, {}).items()):
+            for target in list(targets):
+                self.remove_edge(paper_id, target, relation_type)
+
+    def remove_paper(self, paper_id: int) -> None:
+        self.remove_outgoing(paper_id)
+        for relation_type, sources in list(self.incoming.get(paper_id, {}).items()):
+            for source in list(sources):
+                self.remove_edge(source, paper_id, relation_type)
+
+    @staticmethod
+    def _discard(adjacency: dict[int, dict[str, set[int]]], paper_id: int, relation_type: str, other: int) -> None:
+        by_type = adjacency[paper_id]
+        by_type[relation_type].discard(other)
+        if by_type[relation_type] == set():
+            del by_type[relation_type]
+            if by_type == {}:
+                del adjacency[paper_id]
+
+    def relation_types(self) -> set[str]:
+        return {relation_type for _, _, relation_type in self.notes}
+
+    def _groups(self, paper_id: int, relation_type: Optional[str], direction: str) -> list[set[int]]:
+        # direction is 'out' (paper -> others), 'in' (others -> paper) or 'both'
+        if direction not in ['out', 'in', 'both']:
+            raise ValueError(f"{direction} is not a valid direction. Please use one of {['out', 'in', 'both']}")
+        sides = []
+        if direction in ['out', 'both']:
+            sides.append(self.outgoing.get(paper_id, {}))
+        if direction in ['in', 'both']:
+            sides.append(self.incoming.get(paper_id, {}))
+        if relation_type is None:
+            return [others for by_type in sides for others in by_type.values()]
+        return [by_type[relation_type] for by_type in sides if relation_type in by_type]
+
+    def adjacent(self, paper_id: int, relation_type: Optional[str] = None, direction: str = 'both') -> Iterator[int]:
+        for others in self._groups(paper_id, relation_type, direction):
+            yield from others
+
+    def degree(self, paper_id: int, relation_type: Optional[str] = None, direction: str = 'both') -> int:
+        # number of distinct related papers
+        groups = self._groups(paper_id, relation_type, direction)
+        if len(groups) == 1:
+            return len(groups[0])
+        return len(set().union(*groups))
+
+    def neighbourhood(self,
+                      paper_id: int,
+                      hops: int = 1,
+                      relation_type: Optional[str] = None,
+                      direction: str = 'both') -> dict[int, int]:
+        # every paper within `hops` steps, mapped to its distance
+        distances = {paper_id: 0}
+        frontier = [paper_id]
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for current in frontier:
+                for other in self.adjacent(current, relation_type, direction):
+                    if other not in distances:
+                        distances[other] = hop
+                        next_frontier.append(other)
+            if next_frontier == []:
+                break
+            frontier = next_frontier
+        del distances[paper_id]
+        return distances
+
+    def shortest_path(self,
+                      source: int,
+                      target: int,
+                      relation_type: Optional[str] = None,
+                      direction: str = 'out') -> Optional[list[int]]:
+        # bidirectional breadth-first search, expanding the smaller frontier each round
+        if source == target:
+            return [source]
+        reverse = {'out': 'in', 'in': 'out', 'both': 'both'}[direction]
+        forward_parents: dict[int, Optional[int]] = {source: None}
+        backward_parents: dict[int, Optional[int]] = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+        while forward_frontier != [] and backward_frontier != []:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self._expand(forward_frontier, forward_parents, backward_parents, relation_type, direction)
+            else:
+                backward_frontier, meeting = self._expand(backward_frontier, backward_parents, forward_parents, relation_type, reverse)
+            if meeting is not None:
+                path = []
+                node: Optional[int] = meeting
+                while node is not None:
+                    path.append(node)
+                    node = forward_parents[node]
+                path.reverse()
+                node = backward_parents[meeting]
+                while node is not None:
+                    path.append(node)
+                    node = backward_parents[node]
+                return path
+        return None
+
+    def _expand(self,
+                frontier: list[int],
+                parents: dict[int, Optional[int]],
+                other_parents: dict[int, Optional[int]],
+                relation_type: Optional[str],
+                direction: str) -> tuple[list[int], Optional[int]]:
+        next_frontier = []
+        for current in frontier:
+            for other in self.adjacent(current, relation_type, direction):
+                if other not in parents:
+                    parents[other] = current
+                    if other in other_parents:
+                        return next_frontier, other
+                    next_frontier.append(other)
+        return next_frontier, None
+
+    def connected_components(self, relation_type: Optional[str] = None) -> list[set[int]]:
+        # weakly connected components, largest first; papers without relations are left out
+        seen: set[int] = set()
+        components = []
+        for paper_id in list(self.outgoing.keys()) + list(self.incoming.keys()):
+            if paper_id in seen:
+                continue
+            component = {paper_id}
+            stack = [paper_id]
+            while stack != []:
+                current = stack.pop()
+                for other in self.adjacent(current, relation_type, 'both'):
+                    if other not in component:
+                        component.add(other)
+                        stack.append(other)
+            seen |= component
+            if len(component) > 1:
+                components.append(component)
+        components.sort(key=len, reverse=True)
+        return components
+
+    def most_connected(self, n: int = 10, relation_type: Optional[str] = None, direction: str = 'both') -> list[tuple[int, int]]:
+        paper_ids = set(self.outgoing.keys()) | set(self.incoming.keys())
+        degrees = ((paper_id, self.degree(paper_id, relation_type, direction)) for paper_id in paper_ids)
+        return heapq.nlargest(n, degrees, key=lambda item: (item[1], -item[0]))
@@ -0,0 +1,95 @@
+from typing import Iterable, Optional
+
+
+class KeywordIndex():
+    # keyword -> ids of the papers carrying it, kept in step with Paper.keywords by the Organizer
+
+    def __init__(self) -> None:
+        self.postings: dict[str, set[int]] = {}
+
+    def add(self, keyword: str, paper_id: int) -> None:
+        self.postings.setdefault(keyword, set()).add(paper_id)
+
+    def discard(self, keyword: str, paper_id: int) -> None:
+        paper_ids = self.postings.get(keyword)
+        if paper_ids is not None:
+            paper_ids.discard(paper_id)
+            if paper_ids == set():
+                del self.postings[keyword]
+
+    def remove_paper(self, paper_id: int, keywords: Iterable[str]) -> None:
+        for keyword in keywords:
+            self.discard(keyword, paper_id)
+
+    def rename(self, old_name: str, new_name: str) -> set[int]:
+        paper_ids = self.postings.pop(old_name, set())
+        if paper_ids != set():
+            self.postings.setdefault(new_name, set()).update(paper_ids)
+        return paper_ids
+
+    def get(self, keyword: str) -> set[int]:
+        return self.postings.get(keyword, set())
+
+    def keywords(self) -> list[str]:
+        return list(self.postings.keys())
+
+    def query(self,
+              all_of: Optional[Iterable[str]] = None,
+              any_of: Optional[Iterable[str]] = None,
+              none_of: Optional[Iterable[str]] = None,
+              universe: Optional[Iterable[int]] = None) -> set[int]:
+        # AND over all_of, OR over any_of, NOT over none_of; smallest posting lists are intersected first
+        result: Optional[set[int]] = None
+        if all_of is not None:
+            postings = sorted((self.get(keyword) for keyword in all_of), key=len)
+            if postings != []:
+                result = set(postings[0])
+                for paper_ids in postings[1:]:
+                    result &= paper_ids
+                    if result == set():
+                        return result
+        if any_of is not None:
+            union: set[int] = set()
+            for keyword in any_of:
+                union |= self.get(keyword)
+            result = union if result is None else result & union
+        if result is None:
+            # a pure NOT query starts from every paper
+            result = set(universe) if universe is not None else set()
+        if none_of is not None:
+            for keyword in none_of:
+                result -= self.get(keyword)
+        return result
+
+
+class CitationKeyIndex():
+    # citation key <-> paper id, filled in when a bibtex sets Paper.key
+
+    def __init__(self) -> None:
+        self.key_to_id: dict[str, int] = {}
+        self.id_to_key: dict[int, str] = {}
+
+    def check(self, key: str, paper_id: int) -> None:
+        owner = self.key_to_id.get(key)
+        if owner is not None and owner != paper_id:
+            raise ValueError(f'The citation key {key} is already used by paper {owner}.')
+
+    def assign(self, key: str, paper_id: int) -> None:
+        self.check(key, paper_id)
+        self.remove_paper(paper_id)
+        self.key_to_id[key] = paper_id
+        self.id_to_key[paper_id] = key
+
+    def remove_paper(self, paper_id: int) -> None:
+        key = self.id_to_key.pop(paper_id, None)
+        if key is not None:
+            del self.key_to_id[key]
+
+    def get(self, key: str) -> Optional[int]:
+        return self.key_to_id.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.key_to_id
+
+    def __len__(self) -> int:
+        return len(self.key_to_id)
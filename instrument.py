@@ -0,0 +1,112 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class OperationStats():
+
+    __slots__ = ('calls', 'seconds', 'files_opened', 'bytes_read', 'bytes_written')
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.seconds: float = 0.0
+        self.files_opened: int = 0
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+
+class Instrumentation():
+    # opt-in per-operation wall time, call counts and file i/o. I/O is charged to every
+    # operation running at that moment, so a data_save includes the notes files it writes.
+    # hooks are called as hook(operation, seconds, io) after every instrumented call
+
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self.operations: dict[str, OperationStats] = {}
+        self.hooks: list[Callable[[str, float, dict[str, int]], None]] = []
+        self.active: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def enable(self, reset: bool = True) -> None:
+        if reset:
+            self.reset()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self.lock:
+            self.operations = {}
+
+    def add_hook(self, hook: Callable[[str, float, dict[str, int]], None]) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[str, float, dict[str, int]], None]) -> None:
+        self.hooks.remove(hook)
+
+    def _stats(self, name: str) -> OperationStats:
+        stats = self.operations.get(name)
+        if stats is None:
+            stats = self.operations[name] = OperationStats()
+        return stats
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        with self.lock:
+            stats = self._stats(name)
+            before = (stats.files_opened, stats.bytes_read, stats.bytes_written)
+            self.active[name] = self.active.get(name, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                self.active[name] -= 1
+                if self.active[name] == 0:
+                    del self.active[name]
+                stats.calls += 1
+                stats.seconds += seconds
+                io = {'files_opened': stats.files_opened - before[0],
+                      'bytes_read': stats.bytes_read - before[1],
+                      'bytes_written': stats.bytes_written - before[2]}
+            for hook in self.hooks:
+                hook(name, seconds, io)
+
+    def record_io(self, opened: int = 0, read: int = 0, written: int = 0) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            for name in self.active:
+                stats = self.operations[name]
+                stats.files_opened += opened
+                stats.bytes_read += read
+                stats.bytes_written += written
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        with self.lock:
+            return {name: stats.as_dict() for name, stats in self.operations.items()}
+
+
+instrumentation = Instrumentation()
+
+
+def instrumented(name: str) -> Callable:
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return function(*args, **kwargs)
+            with instrumentation.operation(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,60 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from .instrument import instrumentation
+
+
+def parse_notes(text: str) -> list[str]:
+    notes = text.split("THIS IS A SPLIT LINE\n")
+    return [note.rstrip('\n') for note in notes if (note.strip() != '') and (not note.startswith('RELATION '))]
+
+
+class NotesCache():
+    # parsed notes keyed by file path, valid while the file keeps the same mtime and size;
+    # max_entries bounds the cache as an LRU, None keeps every file
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries: Optional[int] = max_entries
+        self.entries: OrderedDict[str, tuple[int, int, list[str]]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, notes_loc: str) -> list[str]:
+        stat = os.stat(notes_loc)
+        cached = self.entries.get(notes_loc)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            self.hits += 1
+            if self.max_entries is not None:
+                self.entries.move_to_end(notes_loc)
+            return list(cached[2])
+
+        self.misses += 1
+        with open(notes_loc, 'r') as file:
+            notes = parse_notes(file.read())
+        instrumentation.record_io(opened=1, read=stat.st_size)
+        self._store(notes_loc, stat, notes)
+        return list(notes)
+
+    def put(self, notes_loc: str, notes: list[str]) -> None:
+        # record notes that were just written, so the next read is a hit
+        self._store(notes_loc, os.stat(notes_loc), list(notes))
+
+    def _store(self, notes_loc: str, stat: os.stat_result, notes: list[str]) -> None:
+        self.entries[notes_loc] = (stat.st_mtime_ns, stat.st_size, notes)
+        if self.max_entries is not None:
+            self.entries.move_to_end(notes_loc)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, notes_loc: Optional[str] = None) -> None:
+        if notes_loc is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(notes_loc, None)
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+
+default_notes_cache = NotesCache()
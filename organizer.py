@@ -1,20 +1,104 @@
 import os
-import glob
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import AbstractSet, Iterable, Iterator, Optional, TextIO
 
-from .paper import Paper
+import pandas as pd
+
+from .paper import Paper, LazyPaper
+from .index import KeywordIndex, CitationKeyIndex
+from .graph import RelationGraph
+from .fulltext import FullTextIndex
+from .dedup import HashIndex, fingerprint
+from .instrument import instrumentation, instrumented
+from .notes import NotesCache
+from .bibtex import BibImportReport, iter_bib_entries, parse_and_validate, normalize_title, skipped_entries
+from .storage import CatalogStore, CSVStore, SQLiteStore, SaveSummary, atomic_write, open_store, migrate_store
+from .snapshot import directory_fingerprint, read_snapshot, write_snapshot
+from .CONSTANT import safe_categories
+from .view import CatalogView
+
+
+citation_pattern = re.compile(r'\\(?:citation|[A-Za-z]*cite[A-Za-z]*\*?(?:\s*\[[^\]]*\]){0,2})\s*\{([^}]*)\}')
+
+registered_pattern = re.compile(r'(\d+)_registered\.pdf')
+
+batch_operations = ['add_keyword', 'del_keyword', 'add_category', 'add_relation']
+
+
+class IngestSummary():
+
+    def __init__(self) -> None:
+        self.added: dict[str, int] = {}
+        self.loaded: list[int] = []
+        self.known: list[int] = []
+        self.missing: list[int] = []
+        self.duplicates: dict[str, int] = {}
+        self.failed: dict[str, str] = {}
+
+    def __str__(self) -> str:
+        info = f'Added {len(self.added)} new pdfs and loaded {len(self.loaded)} registered pdfs into the CollectionOfPapers dataset, '
+        info += f'{len(self.known)} papers were already loaded.'
+        if self.missing != []:
+            info += f'\nWarning: the pdfs of papers {self.missing} are missing.'
+        for pdf_name, paper_id in self.duplicates.items():
+            info += f'\nDuplicate: {pdf_name} has the same content as paper {paper_id} and was not registered.'
+        for pdf_name, error in self.failed.items():
+            info += f'\nFailed to register {pdf_name}: {error}'
+        return info
+
+
+class BatchResult():
+
+    def __init__(self) -> None:
+        self.operations: int = 0
+        self.changed: dict[str, int] = {operation: 0 for operation in batch_operations}
+        self.unchanged: dict[str, int] = {operation: 0 for operation in batch_operations}
+        self.papers: set[int] = set()
+        self.saved: Optional[SaveSummary] = None
+
+    def __str__(self) -> str:
+        info = f'Applied {self.operations} batch operations, {len(self.papers)} papers changed.'
+        for operation in batch_operations:
+            if self.changed[operation] or self.unchanged[operation]:
+                info += f'\n{operation}: {self.changed[operation]} changes, {self.unchanged[operation]} no-ops.'
+        if self.saved is not None:
+            info += f'\n{self.saved}'
+        return info
 
 
 class Organizer():
 
-    def __init__(self, collection_loc: str) -> None:
+    def __init__(self,
+                 collection_loc: str,
+                 store: str | CatalogStore = 'sqlite',
+                 lazy: bool = False,
+                 notes_cache_size: Optional[int] = None) -> None:
         self.paper_no: int = 0
+        # lazy: paper_dict holds LazyPaper handles that load their data on first access
+        # notes_cache_size: bound on the number of parsed notes files kept in memory, None keeps all
         self.paper_dict: dict[int, Paper] = {}
+        self.lazy: bool = lazy
+        self.keyword_index: KeywordIndex = KeywordIndex()
+        self.key_index: CitationKeyIndex = CitationKeyIndex()
+        self.notes_cache: NotesCache = NotesCache(notes_cache_size)
+        self.relation_graph: RelationGraph = RelationGraph()
+        self.fulltext_index: Optional[FullTextIndex] = None
+        self.hash_index: Optional[HashIndex] = None
+        # built on the first catalog query, see catalog_frame
+        self.catalog_view: Optional[CatalogView] = None
 
         if os.path.exists(collection_loc):
             self.collection_loc: str = collection_loc
-            self.papers_loc: str = collection_loc + '\\papers\\'
-            self.notes_loc: str = collection_loc + '\\notes\\'
-            self.papers_data_loc: str = collection_loc + '\\data\\'
+            self.papers_loc: str = os.path.join(collection_loc, 'papers')
+            self.notes_loc: str = os.path.join(collection_loc, 'notes')
+            self.papers_data_loc: str = os.path.join(collection_loc, 'data')
+            # kept outside data/, so that writing it does not change the csv store's fingerprint
+            self.snapshot_loc: str = os.path.join(collection_loc, 'catalog.snapshot')
+            # hash and full-text indexes, kept out of data/ so their sqlite journals never change the csv store's fingerprint
+            self.index_loc: str = os.path.join(collection_loc, 'index')
         else:
             raise ValueError('This path does not exist for CollectionOfPapers to set up.')
         
@@ -24,54 +108,418 @@ class Organizer():
             os.makedirs(self.notes_loc)
         if not os.path.exists(self.papers_data_loc):
             os.makedirs(self.papers_data_loc)
+        if not os.path.exists(self.index_loc):
+            os.makedirs(self.index_loc)
+
+        if isinstance(store, CatalogStore):
+            self.store: CatalogStore = store
+        else:
+            self.store: CatalogStore = open_store(self.papers_data_loc, store)
+        stored_ids = self.store.paper_ids()
+        if isinstance(self.store, SQLiteStore) and stored_ids == [] and CSVStore(self.papers_data_loc).paper_ids() != []:
+            # collections from before the consolidated store keep their data in data/<id>.csv, it is copied over once
+            self.migrate_from_csv()
+            stored_ids = self.store.paper_ids()
+        # ids are never given out twice, even after their pdf was removed: the counter is kept in the store,
+        # and ids with stored data count as taken for stores written before it was
+        self.paper_no = max(self.store.load_counter(), stored_ids[-1] if stored_ids != [] else 0)
+        self.saved_paper_no: int = self.paper_no
 
-    def add_paper(self, pdf_name: str, registered: bool, summary: bool = True) -> None:
+    @classmethod
+    def open(cls,
+             collection_loc: str,
+             store: str | CatalogStore = 'sqlite',
+             lazy: bool = False,
+             notes_cache_size: Optional[int] = None,
+             summary: bool = True) -> 'Organizer':
+        # reopen from the snapshot while papers/ and the store are unchanged since it was written,
+        # otherwise scan and load the whole collection and write a fresh snapshot
+        organizer = cls(collection_loc, store=store, lazy=lazy, notes_cache_size=notes_cache_size)
+        if organizer.load_snapshot():
+            if summary:
+                print(f'Loaded {len(organizer.paper_dict)} papers from the snapshot of the CollectionOfPapers dataset.')
+            return organizer
+        organizer.auto_add_papers(summary=summary)
+        organizer.data_load(summary=summary)
+        organizer.save_snapshot()
+        return organizer
+
+    def add_paper(self, pdf_name: str, registered: bool, summary: bool = True, duplicates: str = 'reject') -> None:
+        if duplicates not in ['reject', 'link', 'allow']:
+            raise ValueError(f"{duplicates} is not a valid duplicates policy. Please use one of {['reject', 'link', 'allow']}")
         if not pdf_name.endswith('.pdf'):
             pdf_name += '.pdf'
-        if os.path.exists(self.papers_loc + pdf_name):
-            self.paper_no += 1
+        pdf_loc = os.path.join(self.papers_loc, pdf_name)
+        if os.path.exists(pdf_loc):
+            if not registered and duplicates != 'allow':
+                # compared against the loaded papers only, so one add does not rescan papers/
+                _, found = self._find_duplicates([pdf_name], self.paper_dict.keys())
+                if pdf_name in found:
+                    if duplicates == 'link':
+                        self._get_hash_index().link({pdf_name: found[pdf_name]})
+                    raise ValueError(f'{pdf_name} has the same content as paper {found[pdf_name]}.')
             if registered:
                 paper_no = int(pdf_name[:-15])
-                self.paper_dict[paper_no] = Paper(self.collection_loc, paper_no)
+                self.paper_no = max(self.paper_no, paper_no)
+                self._save_counter()
+                self.paper_dict[paper_no] = self._new_paper(paper_no)
             else:
-                os.rename(self.papers_loc + pdf_name, self.papers_loc + f'{self.paper_no}_registered.pdf')
-                self.paper_dict[self.paper_no] = Paper(self.collection_loc, self.paper_no)
+                self.paper_no += 1
+                self._save_counter()
+                os.rename(pdf_loc, os.path.join(self.papers_loc, f'{self.paper_no}_registered.pdf'))
+                if self.hash_index is not None:
+                    self.hash_index.rename({pdf_name: f'{self.paper_no}_registered.pdf'})
+                self.paper_dict[self.paper_no] = self._new_paper(self.paper_no)
                 paper_no = self.paper_no
+            self._track_sizes([paper_no])
             if summary:
                 print(f'Added pdf with name {pdf_name} into the CollectionOfPapers dataset. Paper ID: {paper_no}')
         else:
             raise ValueError(f'This pdf does not exist under the path {self.papers_loc}.')
         
-    def auto_add_papers(self, summary: bool = True) -> None:
-        # get all pdf names under the path (remove .pdf suffix)
-        pdf_names = [os.path.basename(file_path) for file_path in glob.glob(os.path.join(self.papers_loc, '*'))]
-        pdf_names = [name[:-4] if name.endswith('.pdf') else name for name in pdf_names]
-
-        registered_pdf_names = [name for name in pdf_names if name.endswith('_registered')]
-        active_pdf_names = {str(name) for name in set(self.paper_dict.keys())}
-        inactive_pdf_names = set(registered_pdf_names) - active_pdf_names
-        unregistered_pdf_names = set(pdf_names) - set(registered_pdf_names)
-
-        for pdf_name in inactive_pdf_names:
-            self.add_paper(pdf_name, True, summary=summary)
-            
-        for pdf_name in unregistered_pdf_names:
-            self.add_paper(pdf_name, False, summary=summary)
+    def remove_paper(self, paper_id: int, delete_data: bool = False) -> None:
+        # unregister a paper whose pdf went away; its stored data is kept unless delete_data is set
+        self._unindex_paper(paper_id)
+        # edges from other papers into this one go too, so relation queries never return an unknown id
+        self.relation_graph.remove_paper(paper_id)
+        del self.paper_dict[paper_id]
+        if self.hash_index is not None:
+            self.hash_index.untrack([f'{paper_id}_registered.pdf'])
+        if delete_data:
+            self.store.delete([paper_id])
+
+    def _new_paper(self, paper_id: int) -> Paper:
+        self._mark_changed([paper_id])
+        if self.lazy:
+            return LazyPaper(self.collection_loc, paper_id, store=self.store, key_index=self.key_index, notes_cache=self.notes_cache)
+        return Paper(self.collection_loc, paper_id, key_index=self.key_index, notes_cache=self.notes_cache)
+
+    @instrumented('auto_add_papers')
+    def auto_add_papers(self, summary: bool = True, workers: Optional[int] = None, duplicates: str = 'reject') -> IngestSummary:
+        # one scandir pass classifies every pdf, then new ids are registered in bulk.
+        # duplicates: 'reject' leaves pdfs whose content is already registered in place and reports them,
+        # 'link' also remembers them so that later scans skip them quietly, 'allow' registers them anyway
+        if duplicates not in ['reject', 'link', 'allow']:
+            raise ValueError(f"{duplicates} is not a valid duplicates policy. Please use one of {['reject', 'link', 'allow']}")
+        registered_ids = set()
+        unregistered_pdf_names = []
+        with os.scandir(self.papers_loc) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith('.pdf') or not entry.is_file():
+                    continue
+                match = registered_pattern.fullmatch(entry.name)
+                if match is not None:
+                    registered_ids.add(int(match.group(1)))
+                else:
+                    unregistered_pdf_names.append(entry.name)
+        instrumentation.record_io(opened=1)
+
+        ingest = IngestSummary()
+        ingest.known = sorted(registered_ids & self.paper_dict.keys())
+        ingest.missing = sorted(self.paper_dict.keys() - registered_ids)
+        inactive_ids = sorted(registered_ids - self.paper_dict.keys())
+        if registered_ids != set():
+            # new ids must never collide with a registered file, whatever order they were added in
+            self.paper_no = max(self.paper_no, max(registered_ids))
+
+        self._register(unregistered_pdf_names, inactive_ids, registered_ids, ingest, workers, duplicates)
+        if summary:
+            print(ingest)
+        return ingest
+
+    @instrumented('add_papers')
+    def add_papers(self,
+                   pdf_names: list[str],
+                   summary: bool = True,
+                   workers: Optional[int] = None,
+                   duplicates: str = 'reject',
+                   file_stats: Optional[dict[str, tuple[int, int]]] = None) -> IngestSummary:
+        # registers a batch of new pdfs under papers/ in one call, checked for copies of the loaded papers only,
+        # so the cost depends on the batch and not on the collection. file_stats: name -> (size, mtime_ns) the
+        # caller already knows, e.g. from the watcher's own listing, those files are not statted again
+        if duplicates not in ['reject', 'link', 'allow']:
+            raise ValueError(f"{duplicates} is not a valid duplicates policy. Please use one of {['reject', 'link', 'allow']}")
+        ingest = IngestSummary()
+        self._register(pdf_names, [], self.paper_dict.keys(), ingest, workers, duplicates, file_stats)
+        if summary:
+            print(ingest)
+        return ingest
+
+    def _register(self,
+                  unregistered_pdf_names: list[str],
+                  inactive_ids: list[int],
+                  registered_ids: AbstractSet[int],
+                  ingest: IngestSummary,
+                  workers: Optional[int],
+                  duplicates: str,
+                  file_stats: Optional[dict[str, tuple[int, int]]] = None) -> None:
+        found: dict[str, int | str] = {}
+        if duplicates != 'allow' and unregistered_pdf_names != []:
+            unregistered_pdf_names, found = self._find_duplicates(unregistered_pdf_names, registered_ids, workers, file_stats)
+            # copies linked by an earlier scan are skipped without being reported again
+            linked = self._get_hash_index().linked
+            found = {pdf_name: target for pdf_name, target in found.items() if pdf_name not in linked}
+
+        # unregistered pdfs get consecutive ids and are renamed on the worker pool
+        renames = []
+        for pdf_name in sorted(unregistered_pdf_names):
+            self.paper_no += 1
+            renames.append((pdf_name, self.paper_no))
+        self._save_counter()
+        renamed_ids = []
+        for (pdf_name, paper_id), error in zip(renames, self._map_io(self._rename_pdf, renames, workers)):
+            if error is None:
+                renamed_ids.append(paper_id)
+                ingest.added[pdf_name] = paper_id
+            else:
+                ingest.failed[pdf_name] = error
+        if self.hash_index is not None:
+            self.hash_index.rename({pdf_name: f'{paper_id}_registered.pdf' for pdf_name, paper_id in ingest.added.items()})
+        for pdf_name, target in found.items():
+            # a copy of another new pdf points at the id that pdf has just been given
+            paper_id = ingest.added.get(target) if isinstance(target, str) else target
+            if paper_id is not None:
+                ingest.duplicates[pdf_name] = paper_id
+        if duplicates == 'link' and ingest.duplicates != {}:
+            self._get_hash_index().link(ingest.duplicates)
+
+        new_ids = inactive_ids + renamed_ids
+        if self.lazy:
+            papers = [self._new_paper(paper_id) for paper_id in new_ids]
+        else:
+            papers = list(self._map_io(self._new_paper, new_ids, workers))
+        for paper_id, paper in zip(new_ids, papers):
+            self.paper_dict[paper_id] = paper
+        self._track_sizes(new_ids)
+        ingest.loaded = inactive_ids
+
+    def _save_counter(self) -> None:
+        # written before the new ids are used, so an id is persisted as taken before any file carries it
+        if self.paper_no > self.saved_paper_no:
+            self.store.save_counter(self.paper_no)
+            self.saved_paper_no = self.paper_no
+
+    def _get_hash_index(self) -> HashIndex:
+        if self.hash_index is None:
+            self.hash_index = HashIndex(self._side_index_loc('hashes.sqlite'))
+        return self.hash_index
+
+    def _side_index_loc(self, name: str) -> str:
+        # collections from before index/ existed keep these files in data/, they are moved over on first use
+        index_loc = os.path.join(self.index_loc, name)
+        legacy_loc = os.path.join(self.papers_data_loc, name)
+        if not os.path.exists(index_loc) and os.path.exists(legacy_loc):
+            os.replace(legacy_loc, index_loc)
+        return index_loc
+
+    def _track_sizes(self, paper_ids: Iterable[int]) -> None:
+        # keep the size map of the hash index current for newly registered pdfs, once it has been filled
+        if self.hash_index is not None and self.hash_index.synced:
+            names = [f'{paper_id}_registered.pdf' for paper_id in paper_ids]
+            self.hash_index.track({name: os.stat(os.path.join(self.papers_loc, name)).st_size for name in names})
+
+    def _sync_sizes(self, registered_ids: AbstractSet[int]) -> None:
+        # the first duplicate check of a process stats every registered pdf, later ones are kept current incrementally
+        hash_index = self._get_hash_index()
+        if hash_index.synced:
+            return
+        file_sizes = {}
+        for paper_id in registered_ids:
+            name = f'{paper_id}_registered.pdf'
+            path = os.path.join(self.papers_loc, name)
+            if os.path.exists(path):
+                file_sizes[name] = os.stat(path).st_size
+        hash_index.track(file_sizes)
+        hash_index.synced = True
+
+    def _find_duplicates(self,
+                         pdf_names: list[str],
+                         registered_ids: AbstractSet[int],
+                         workers: Optional[int] = None,
+                         file_stats: Optional[dict[str, tuple[int, int]]] = None) -> tuple[list[str], dict[str, int | str]]:
+        # returns the pdfs to register and, for each copy, the paper id or new pdf it duplicates;
+        # only files whose size matches another file are hashed, and digests are cached by size and mtime.
+        # Registered pdfs are found through the size map of the hash index, so the cost depends on the new pdfs
+        hash_index = self._get_hash_index()
+        self._sync_sizes(registered_ids)
+        found: dict[str, int | str] = {pdf_name: hash_index.linked[pdf_name] for pdf_name in pdf_names if pdf_name in hash_index.linked}
+        pdf_names = [pdf_name for pdf_name in pdf_names if pdf_name not in hash_index.linked]
+        new_stats = {}
+        for pdf_name in pdf_names:
+            if file_stats is not None and pdf_name in file_stats:
+                new_stats[pdf_name] = file_stats[pdf_name]
+            else:
+                stat = os.stat(os.path.join(self.papers_loc, pdf_name))
+                new_stats[pdf_name] = (stat.st_size, stat.st_mtime_ns)
+        size_counts: dict[int, int] = {}
+        for size, _ in new_stats.values():
+            size_counts[size] = size_counts.get(size, 0) + 1
+
+        files = {}
+        registered_names = {}
+        for size in size_counts:
+            for name in hash_index.names_with_size(size):
+                match = registered_pattern.fullmatch(name)
+                if match is None or int(match.group(1)) not in registered_ids:
+                    continue
+                path = os.path.join(self.papers_loc, name)
+                if not os.path.exists(path):
+                    hash_index.untrack([name])
+                    continue
+                stat = os.stat(path)
+                if stat.st_size != size:
+                    # changed on disk since it was tracked
+                    hash_index.track({name: stat.st_size})
+                    continue
+                files[name] = (path, stat.st_size, stat.st_mtime_ns)
+                registered_names[name] = int(match.group(1))
+        registered_sizes = {files[name][1] for name in registered_names}
+        for pdf_name, (size, mtime_ns) in new_stats.items():
+            if size_counts[size] > 1 or size in registered_sizes:
+                files[pdf_name] = (os.path.join(self.papers_loc, pdf_name), size, mtime_ns)
+        digests = hash_index.digests(files, workers)
+
+        owners: dict[str, int | str] = {digests[name]: paper_id for name, paper_id in registered_names.items()}
+        keep = []
+        for pdf_name in sorted(pdf_names):
+            digest = digests.get(pdf_name)
+            if digest is not None and digest in owners:
+                found[pdf_name] = owners[digest]
+                continue
+            if digest is not None:
+                owners[digest] = pdf_name
+            keep.append(pdf_name)
+        return keep, found
+
+    def find_near_duplicates(self, indices: list[int] | None = None) -> list[list[int]]:
+        # groups of papers whose bibtex share normalized title, first author surname and year
+        groups: dict[str, list[int]] = {}
+        for paper_id in (sorted(self.paper_dict) if indices is None else indices):
+            paper = self.paper_dict[paper_id]
+            if 'bibtex' not in paper.active_attrs:
+                continue
+            key = fingerprint(paper.title,
+                              paper.author if 'author' in paper.active_attrs else None,
+                              paper.year if 'year' in paper.active_attrs else None)
+            if key is not None:
+                groups.setdefault(key, []).append(paper_id)
+        return [paper_ids for paper_ids in groups.values() if len(paper_ids) > 1]
+
+    def _rename_pdf(self, rename: tuple[str, int]) -> Optional[str]:
+        pdf_name, paper_id = rename
+        try:
+            os.rename(os.path.join(self.papers_loc, pdf_name), os.path.join(self.papers_loc, f'{paper_id}_registered.pdf'))
+        except OSError as error:
+            return str(error)
+        return None
+
+    def _map_io(self, function, items: list, workers: Optional[int] = None) -> list:
+        # file operations release the GIL, so a thread pool overlaps their syscalls
+        if len(items) < 64 or workers == 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(function, items, chunksize=256))
 
     def set_paper_bibtex(self, paper_id: int, bibtex: str):
         paper: Paper = self.paper_dict[paper_id]
         paper.set_bibtex(bibtex)
+        self._mark_changed([paper_id])
+
+    @instrumented('import_bib')
+    def import_bib(self,
+                   bib_loc: str,
+                   mapping: Optional[dict[str, int]] = None,
+                   overwrite: bool = False,
+                   workers: Optional[int] = None,
+                   summary: bool = True,
+                   chunk_size: int = 1024) -> BibImportReport:
+        # entries are matched to papers by the explicit key -> paper id mapping, then by the
+        # citation key already in the collection, then by normalized title. The file is read and parsed
+        # chunk_size entries at a time, so memory stays bounded however large the .bib file is
+        report = BibImportReport()
+
+        # only papers that already have a bibtex have a title, so matching by title can only overwrite
+        title_index = {}
+        if overwrite:
+            for paper_id, paper in self.paper_dict.items():
+                if paper.title is not None:
+                    title_index[normalize_title(paper.title)] = paper_id
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers is not None and workers > 1 else None
+        try:
+            with open(bib_loc, 'r', encoding='utf-8') as file:
+                raw_entries = (raw for raw in iter_bib_entries(file)
+                               if raw.lstrip('@ \t').split('{', 1)[0].strip().lower() not in skipped_entries)
+                position = 0
+                while True:
+                    chunk = list(islice(raw_entries, chunk_size))
+                    if chunk == []:
+                        break
+                    if executor is not None:
+                        parsed = list(executor.map(parse_and_validate, chunk, chunksize=64))
+                    else:
+                        parsed = [parse_and_validate(raw) for raw in chunk]
+                    for raw, (entry, errors) in zip(chunk, parsed):
+                        position += 1
+                        self._import_entry(report, position, raw, entry, errors, mapping, title_index, overwrite)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        instrumentation.record_io(opened=1, read=os.path.getsize(bib_loc))
+        self._mark_changed(report.imported.values())
+
+        if summary:
+            print(report)
+        return report
+
+    def _import_entry(self,
+                      report: BibImportReport,
+                      position: int,
+                      raw: str,
+                      entry: Optional[dict[str, str]],
+                      errors: list[str],
+                      mapping: Optional[dict[str, int]],
+                      title_index: dict[str, int],
+                      overwrite: bool) -> None:
+        label = entry['key'] if entry is not None and entry['key'] != '' else f'entry {position}'
+        if errors != []:
+            report.errors[label] = errors
+            return
+        assert entry is not None
+        paper_id = None
+        if mapping is not None:
+            paper_id = mapping.get(entry['key'])
+        if paper_id is None:
+            paper_id = self.key_index.get(entry['key'])
+        if paper_id is None and 'title' in entry:
+            paper_id = title_index.get(normalize_title(entry['title']))
+        if paper_id is None or paper_id not in self.paper_dict:
+            report.unmatched.append(label)
+            return
+
+        paper: Paper = self.paper_dict[paper_id]
+        if paper.bibtex is not None and not overwrite:
+            report.skipped[label] = paper_id
+            return
+        try:
+            paper.set_bibtex(raw.strip(), entry)
+        except ValueError as error:
+            report.errors[label] = [str(error)]
+            return
+        report.imported[label] = paper_id
 
     def add_category(self, indices: list[int] | int, category: str):
         if isinstance(indices, int):
             paper: Paper = self.paper_dict[indices]
             paper.set_category(category)
+            self._mark_changed([indices])
         else:
             for index in indices:
                 paper: Paper = self.paper_dict[index]
                 paper.set_category(category)
+                self._mark_changed([index])
 
-    def add_relation(self, relations: list[list[int | list[int] | bool | str]]):
+    def add_relation(self, relations: list[list[int | list[int] | bool | str]], summary: bool = True):
         for paper1_id, paper2_ids, mutual, relation_type, note in relations:
 
             if not isinstance(paper1_id, int):
@@ -85,91 +533,497 @@ class Organizer():
             if not isinstance(note, str):
                 raise TypeError(f'{note} is not of str type')
             
-            paper1: Paper = self.paper_dict[paper1_id]
-            if isinstance(paper2_ids, list):
-                for paper2_id in paper2_ids:
-                    paper2: Paper = self.paper_dict[paper2_id]
-                    paper1.add_relation(paper2_id, relation_type, note)
-                    if mutual:
-                        paper2.add_relation(paper1_id, relation_type, note)
-                    else:
-                        paper2.add_relation(paper1_id, 'BE ' + relation_type, note)
-            else:
-                paper2_id = paper2_ids
-                paper2: Paper = self.paper_dict[paper2_id]
-                paper1.add_relation(paper2_id, relation_type, note)
-                if mutual:
-                    paper2.add_relation(paper1_id, relation_type, note)
-                else:
-                    paper2.add_relation(paper1_id, 'BE ' + relation_type, note)
+            paper2_ids = paper2_ids if isinstance(paper2_ids, list) else [paper2_ids]
+            for paper2_id in paper2_ids:
+                self._relate(paper1_id, paper2_id, mutual, relation_type, note, summary)
 
-    def add_keyword(self, indices: list[int] | int, keywords: list[str] | str):
-        if isinstance(indices, int):
-            paper: Paper = self.paper_dict[indices]
-            if isinstance(keywords, list):
-                for keyword in keywords:
-                    paper.add_keyword(keyword)
-            else:
-                paper.add_keyword(keywords)
+    def _relate(self, paper1_id: int, paper2_id: int, mutual: bool, relation_type: str, note: str, summary: bool = True) -> bool:
+        # returns False when the relation already exists. The graph is the only duplicate check; as before it,
+        # a relation is the same only with the same type and note, another note is kept as another relation
+        paper1: Paper = self.paper_dict[paper1_id]
+        paper2: Paper = self.paper_dict[paper2_id]
+        if self.relation_graph.has_edge(paper1_id, paper2_id, relation_type, note):
+            if summary:
+                print(f'No Action: the relation from {paper1_id} to {paper2_id} with relation type `{relation_type}` has already been added to paper: {paper1.title}.')
+            return False
+        paper1.add_relation(paper2_id, relation_type, note, summary=summary, check=False)
+        self.relation_graph.add_edge(paper1_id, paper2_id, relation_type, note)
+        if mutual:
+            if not self.relation_graph.has_edge(paper2_id, paper1_id, relation_type, note):
+                paper2.add_relation(paper1_id, relation_type, note, summary=summary, check=False)
+                self.relation_graph.add_edge(paper2_id, paper1_id, relation_type, note)
         else:
-            for index in indices:
-                paper: Paper = self.paper_dict[index]
-                if isinstance(keywords, list):
-                    for keyword in keywords:
-                        paper.add_keyword(keyword)
-                else:
-                    paper.add_keyword(keywords)
-    
-    def del_keyword(self, indices: list[int] | int, keywords: list[str] | str):
-        if isinstance(indices, int):
-            paper: Paper = self.paper_dict[indices]
-            if isinstance(keywords, list):
-                for keyword in keywords:
-                    paper.del_keyword(keyword)
-            else:
-                paper.del_keyword(keywords)
+            # stored on the paper for the notes file, the graph reads it from its incoming edges
+            paper2.add_relation(paper1_id, 'BE ' + relation_type, note, summary=summary, check=False)
+        self._mark_changed([paper1_id, paper2_id])
+        return True
+
+    @instrumented('apply_batch')
+    def apply_batch(self,
+                    operations: Iterable[tuple[list[int] | int, str, object]],
+                    save: bool = True,
+                    summary: bool = True) -> BatchResult:
+        # operations are (indices, operation, argument) records, operation is one of batch_operations:
+        #   add_keyword / del_keyword: a keyword or list of keywords
+        #   add_category: a category from CONSTANT.safe_categories
+        #   add_relation: (paper2_ids, mutual, relation_type, note), indices are the source papers
+        # every record is validated before anything changes, so one invalid record leaves the whole batch
+        # unapplied; no-ops are counted instead of printed and the changes are saved once at the end
+        normalized = self._validate_batch(operations)
+        touched = set()
+        for operation, paper_ids, argument in normalized:
+            touched.update(paper_ids)
+            if operation == 'add_relation':
+                touched.update(argument[0])
+        backup = {paper_id: (self.paper_dict[paper_id].to_records(),
+                             self.paper_dict[paper_id].dirty,
+                             self.paper_dict[paper_id].notes_dirty) for paper_id in touched}
+
+        result = BatchResult()
+        result.operations = len(normalized)
+        try:
+            for operation, paper_ids, argument in normalized:
+                for paper_id in paper_ids:
+                    changed, unchanged = self._apply_operation(operation, paper_id, argument)
+                    result.changed[operation] += changed
+                    result.unchanged[operation] += unchanged
+                    if changed:
+                        result.papers.add(paper_id)
+                        if operation == 'add_relation':
+                            result.papers.update(argument[0])
+        except BaseException:
+            # put every touched paper and its index entries back the way they were
+            for paper_id, (records, dirty, notes_dirty) in backup.items():
+                paper = self.paper_dict[paper_id]
+                self._unindex_paper(paper_id)
+                paper.load_records(records)
+                paper.dirty = dirty
+                paper.notes_dirty = notes_dirty
+                self._index_paper(paper_id)
+            raise
+
+        if save:
+            result.saved = self.data_save()
+        if summary:
+            print(result)
+        return result
+
+    def _apply_operation(self, operation: str, paper_id: int, argument) -> tuple[int, int]:
+        # returns the number of changes and of no-ops
+        paper: Paper = self.paper_dict[paper_id]
+        changed = 0
+        if operation == 'add_keyword':
+            for keyword in argument:
+                if keyword not in paper.keywords:
+                    paper.add_keyword(keyword, summary=False)
+                    self.keyword_index.add(keyword, paper_id)
+                    self._mark_changed([paper_id])
+                    changed += 1
+            return changed, len(argument) - changed
+        elif operation == 'del_keyword':
+            for keyword in argument:
+                if keyword in paper.keywords:
+                    paper.del_keyword(keyword, summary=False)
+                    self.keyword_index.discard(keyword, paper_id)
+                    self._mark_changed([paper_id])
+                    changed += 1
+            return changed, len(argument) - changed
+        elif operation == 'add_category':
+            if 'category' in paper.active_attrs and paper.category == argument:
+                return 0, 1
+            paper.set_category(argument)
+            self._mark_changed([paper_id])
+            return 1, 0
         else:
-            for index in indices:
-                paper: Paper = self.paper_dict[index]
-                if isinstance(keywords, list):
-                    for keyword in keywords:
-                        paper.del_keyword(keyword)
-                else:
-                    paper.del_keyword(keywords)
+            paper2_ids, mutual, relation_type, note = argument
+            for paper2_id in paper2_ids:
+                if self._relate(paper_id, paper2_id, mutual, relation_type, note, summary=False):
+                    changed += 1
+            return changed, len(paper2_ids) - changed
+
+    def _validate_batch(self, operations: Iterable[tuple[list[int] | int, str, object]]) -> list[tuple[str, list[int], object]]:
+        normalized = []
+        errors = []
+        for position, record in enumerate(operations):
+            try:
+                normalized.append(self._validate_operation(record))
+            except (TypeError, ValueError) as error:
+                errors.append(f'record {position}: {error}')
+        if errors != []:
+            info = f'{len(errors)} of {len(normalized) + len(errors)} batch records are invalid, nothing was applied.'
+            for error in errors[:10]:
+                info += f'\n{error}'
+            if len(errors) > 10:
+                info += f'\n... and {len(errors) - 10} more.'
+            raise ValueError(info)
+        return normalized
+
+    def _validate_operation(self, record) -> tuple[str, list[int], object]:
+        if not isinstance(record, (tuple, list)) or len(record) != 3:
+            raise TypeError(f'{record!r} is not an (indices, operation, argument) record')
+        indices, operation, argument = record
+        paper_ids = self._batch_ids(indices)
+        if operation in ['add_keyword', 'del_keyword']:
+            keywords = [argument] if isinstance(argument, str) else argument
+            if not (isinstance(keywords, list) and all(isinstance(keyword, str) for keyword in keywords)):
+                raise TypeError(f'{argument!r} is not of str or list[str] type')
+            for keyword in keywords:
+                # keywords are stored comma separated
+                if keyword == '' or ',' in keyword:
+                    raise ValueError(f'{keyword!r} is not a valid keyword')
+            return operation, paper_ids, keywords
+        elif operation == 'add_category':
+            if argument not in safe_categories:
+                raise ValueError(f'{argument} is not a valid cateogry type. Please use category from {safe_categories}')
+            return operation, paper_ids, argument
+        elif operation == 'add_relation':
+            if not isinstance(argument, (tuple, list)) or len(argument) != 4:
+                raise TypeError(f'{argument!r} is not a (paper2_ids, mutual, relation_type, note) argument')
+            paper2_ids, mutual, relation_type, note = argument
+            paper2_ids = self._batch_ids(paper2_ids)
+            if not isinstance(mutual, bool):
+                raise TypeError(f'{mutual} is not of bool type')
+            if not isinstance(relation_type, str):
+                raise TypeError(f'{relation_type} is not of str type')
+            if not isinstance(note, str):
+                raise TypeError(f'{note} is not of str type')
+            # relations are stored underscore separated, and 'BE ' marks the incoming side
+            if relation_type == '' or '_' in relation_type or relation_type.startswith('BE '):
+                raise ValueError(f'{relation_type!r} is not a valid relation type')
+            return operation, paper_ids, (paper2_ids, mutual, relation_type, note)
+        raise ValueError(f'{operation} is not a valid batch operation. Please use one of {batch_operations}')
+
+    def _batch_ids(self, indices) -> list[int]:
+        paper_ids = [indices] if isinstance(indices, int) else indices
+        if not (isinstance(paper_ids, list) and all(isinstance(paper_id, int) and not isinstance(paper_id, bool) for paper_id in paper_ids)):
+            raise TypeError(f'{indices!r} is not of int or list[int] type')
+        for paper_id in paper_ids:
+            if paper_id not in self.paper_dict:
+                raise ValueError(f'paper {paper_id} is not in the CollectionOfPapers dataset')
+            if self.paper_dict[paper_id].bibtex is None:
+                raise ValueError(f'paper {paper_id} has no bibtex yet')
+        return paper_ids
+
+    def related_papers(self,
+                       paper_id: int,
+                       hops: int = 1,
+                       relation_type: Optional[str] = None,
+                       direction: str = 'both') -> dict[int, int]:
+        # papers within `hops` relations of paper_id, mapped to their distance
+        return self.relation_graph.neighbourhood(paper_id, hops, relation_type, direction)
+
+    def relation_path(self,
+                      source_id: int,
+                      target_id: int,
+                      relation_type: Optional[str] = None,
+                      direction: str = 'out') -> Optional[list[int]]:
+        return self.relation_graph.shortest_path(source_id, target_id, relation_type, direction)
+
+    def relation_components(self, relation_type: Optional[str] = None) -> list[set[int]]:
+        return self.relation_graph.connected_components(relation_type)
+
+    def most_connected_papers(self, n: int = 10, relation_type: Optional[str] = None, direction: str = 'both') -> list[tuple[int, int]]:
+        return self.relation_graph.most_connected(n, relation_type, direction)
+
+    def add_keyword(self, indices: list[int] | int, keywords: list[str] | str, summary: bool = True):
+        indices = [indices] if isinstance(indices, int) else indices
+        keywords = [keywords] if isinstance(keywords, str) else keywords
+        for index in indices:
+            paper: Paper = self.paper_dict[index]
+            for keyword in keywords:
+                paper.add_keyword(keyword, summary=summary)
+                self.keyword_index.add(keyword, index)
+            self._mark_changed([index])
+    
+    def del_keyword(self, indices: list[int] | int, keywords: list[str] | str, summary: bool = True):
+        indices = [indices] if isinstance(indices, int) else indices
+        keywords = [keywords] if isinstance(keywords, str) else keywords
+        for index in indices:
+            paper: Paper = self.paper_dict[index]
+            for keyword in keywords:
+                paper.del_keyword(keyword, summary=summary)
+                self.keyword_index.discard(keyword, index)
+            self._mark_changed([index])
 
     def search_keyword(self, keyword: str) -> list[int]:
-        result_names = []
+        result_names = sorted(self.keyword_index.get(keyword))
         info = f'keyword serach for: {keyword}\n'
-        for name, paper in self.paper_dict.items():
-            if keyword in paper.keywords:
-                result_names.append(name)
-                info += f'{name}: {paper.title}\n'
+        for name in result_names:
+            info += f'{name}: {self.paper_dict[name].title}\n'
         print(info)
         return result_names
+
+    def update_fulltext_index(self, workers: Optional[int] = None, summary: bool = True) -> dict[str, list]:
+        # text is extracted only from registered pdfs that are new or changed since the last update
+        if self.fulltext_index is None:
+            self.fulltext_index = FullTextIndex(self._side_index_loc('fulltext.sqlite'))
+        pdf_locs = {paper_id: paper.paper_loc for paper_id, paper in self.paper_dict.items()}
+        report = self.fulltext_index.update(pdf_locs, workers=workers)
+        if summary:
+            print(f"Indexed {len(report['indexed'])} pdfs, removed {len(report['removed'])} pdfs from the full-text index.")
+            for paper_id, error in report['failed']:
+                print(f'Warning: could not extract text from paper {paper_id}: {error}')
+        return report
+
+    def search_fulltext(self, query: str, limit: int = 10) -> list[int]:
+        if self.fulltext_index is None:
+            self.fulltext_index = FullTextIndex(self._side_index_loc('fulltext.sqlite'))
+        results = self.fulltext_index.search(query, limit)
+        info = f'full-text search for: {query}\n'
+        for name, score in results:
+            title = self.paper_dict[name].title if name in self.paper_dict else None
+            info += f'{name}: {title} ({score:.2f})\n'
+        print(info)
+        return [name for name, _ in results]
+
+    def query_keyword(self,
+                      all_of: list[str] | str | None = None,
+                      any_of: list[str] | str | None = None,
+                      none_of: list[str] | str | None = None) -> list[int]:
+        # boolean keyword filter: every keyword of all_of AND at least one of any_of AND NOT any of none_of
+        all_of = [all_of] if isinstance(all_of, str) else all_of
+        any_of = [any_of] if isinstance(any_of, str) else any_of
+        none_of = [none_of] if isinstance(none_of, str) else none_of
+        if all_of is None and any_of is None and none_of is None:
+            raise ValueError('At least one of all_of, any_of and none_of should be given.')
+        return sorted(self.keyword_index.query(all_of, any_of, none_of, universe=self.paper_dict.keys()))
     
     def get_all_keyword(self) -> list[str]:
-        keyword_list = []
-        for name, paper in self.paper_dict.items():
-            keyword_list.extend(paper.keywords)
-        return list(set(keyword_list))
+        return self.keyword_index.keywords()
     
     def rewrite_keyword(self, old_name: str, new_name: str):
         info = f'rename keyword {old_name} to {new_name}\n'
-        for name, paper in self.paper_dict.items():
-            if old_name in paper.keywords:
-                self.paper_dict[name].keywords = [keyword if keyword != old_name else new_name for keyword in self.paper_dict[name].keywords]
-                info += f'{name}: {paper.title}\n'
+        for name in sorted(self.keyword_index.rename(old_name, new_name)):
+            paper = self.paper_dict[name]
+            keywords = []
+            for keyword in paper.keywords:
+                keyword = new_name if keyword == old_name else keyword
+                if keyword not in keywords:
+                    keywords.append(keyword)
+            paper.keywords = keywords
+            paper.dirty = True
+            self._mark_changed([name])
+            info += f'{name}: {paper.title}\n'
         print(info)
 
-    def data_save(self):
-        for paper in self.paper_dict.values():
+    def _index_fields(self, paper_id: int) -> tuple[list[str], Optional[str], list[list[str]]]:
+        paper = self.paper_dict[paper_id]
+        if isinstance(paper, LazyPaper) and not paper.hydrated:
+            # read the pending records so that indexing does not hydrate the handle
+            keywords, key, relations = [], None, []
+            for attr, info in paper.records or []:
+                if attr == 'keywords':
+                    keywords = info.split(',') if info != '' else []
+                elif attr == 'key':
+                    key = info
+                elif attr == 'relations':
+                    splits = info.split('_')
+                    relations.append([splits[0], splits[1], '_'.join(splits[2:])])
+            return keywords, key, relations
+        return paper.keywords, paper.key if 'key' in paper.active_attrs else None, paper.relations
+
+    def _index_paper(self, paper_id: int, key_conflicts: Optional[dict[int, str]] = None) -> None:
+        # with key_conflicts given, a citation key another paper already owns is recorded there instead of raising,
+        # so stored data from before keys were checked still loads completely
+        self._mark_changed([paper_id])
+        keywords, key, relations = self._index_fields(paper_id)
+        for keyword in keywords:
+            self.keyword_index.add(keyword, paper_id)
+        if key is not None:
+            owner = self.key_index.get(key)
+            if key_conflicts is not None and owner is not None and owner != paper_id:
+                key_conflicts[paper_id] = key
+            else:
+                self.key_index.assign(key, paper_id)
+        # each edge is owned by its source paper, 'BE ' entries are the other paper's edges seen from here;
+        # relations to a removed paper stay in the stored data but never come back into the graph
+        for another_paper, relation, note in relations:
+            if not relation.startswith('BE ') and int(another_paper) in self.paper_dict:
+                self.relation_graph.add_edge(paper_id, int(another_paper), relation, note)
+
+    def _unindex_paper(self, paper_id: int) -> None:
+        self._mark_changed([paper_id])
+        keywords, _, _ = self._index_fields(paper_id)
+        self.keyword_index.remove_paper(paper_id, keywords)
+        self.key_index.remove_paper(paper_id)
+        self.relation_graph.remove_outgoing(paper_id)
+
+    def _mark_changed(self, paper_ids: Iterable[int]) -> None:
+        # rows of the catalog view to rebuild on its next use
+        if self.catalog_view is not None:
+            self.catalog_view.mark(paper_ids)
+
+    @instrumented('catalog_frame')
+    def catalog_frame(self) -> pd.DataFrame:
+        # columnar view with one row per paper: the CONSTANT.py fields, category, keyword and relation counts.
+        # Built on first use, afterwards only rows of papers changed through the organizer are rebuilt;
+        # the frame is shared, copy it before modifying
+        if self.catalog_view is None:
+            self.catalog_view = CatalogView()
+            self.catalog_view.mark(self.paper_dict.keys())
+        return self.catalog_view.refresh(self.paper_dict, self.store)
+
+    @instrumented('query_catalog')
+    def query_catalog(self,
+                      entry: str | list[str] | None = None,
+                      year_from: Optional[int] = None,
+                      year_to: Optional[int] = None,
+                      author: Optional[str] = None,
+                      keywords: list[str] | str | None = None,
+                      category: Optional[str] = None,
+                      sort_by: str | list[str] | None = None,
+                      ascending: bool = True,
+                      columns: Optional[list[str]] = None) -> pd.DataFrame:
+        # e.g. query_catalog(entry='inproceedings', year_from=2020, author='Smith', keywords='graphs');
+        # keywords must all be present and are looked up in the keyword index
+        self.catalog_frame()
+        assert self.catalog_view is not None
+        paper_ids = None
+        if keywords is not None:
+            paper_ids = self.keyword_index.query(all_of=[keywords] if isinstance(keywords, str) else keywords)
+        result = self.catalog_view.query(entry, year_from, year_to, author, paper_ids, category)
+        if sort_by is not None:
+            result = self.catalog_view.sort(result, sort_by, ascending)
+        return result if columns is None else result[columns]
+
+    def count_catalog(self, by: str | list[str], **filters) -> pd.Series:
+        # paper counts per value of `by`, e.g. 'year' or 'venue', over the papers matching query_catalog(**filters)
+        self.catalog_frame()
+        assert self.catalog_view is not None
+        return self.catalog_view.count_by(by, self.query_catalog(**filters) if filters != {} else None)
+
+    def export_catalog(self,
+                       file_loc: str,
+                       sort_by: str | list[str] = 'paper_id',
+                       ascending: bool = True,
+                       columns: Optional[list[str]] = None,
+                       **filters) -> int:
+        # writes the matching rows as csv, returns the number of rows written
+        result = self.query_catalog(**filters)
+        assert self.catalog_view is not None
+        result = result.sort_index(ascending=ascending) if sort_by == 'paper_id' else self.catalog_view.sort(result, sort_by, ascending)
+        if columns is not None:
+            result = result[columns]
+        atomic_write(file_loc, result.to_csv())
+        return len(result)
+
+    @instrumented('data_save')
+    def data_save(self, full: bool = False) -> SaveSummary:
+        # only papers changed since the last save/load are written unless full is set;
+        # the store takes them in one bulk write, notes stay as per-paper text files
+        summary = SaveSummary()
+        records = {}
+        notes_papers = []
+        for paper_id, paper in self.paper_dict.items():
             assert isinstance(paper, Paper)
-            paper.data_save()
+            if full or paper.dirty:
+                records[paper_id] = paper.to_records()
+            if full or paper.notes_dirty:
+                notes_papers.append(paper)
+        if records != {}:
+            summary.bytes_written += self.store.save(records)
+        for paper_id in records:
+            self.paper_dict[paper_id].dirty = False
+        for paper in notes_papers:
+            summary.bytes_written += paper.notes_save()
+        summary.papers = len(records)
+        summary.records = sum(len(rows) for rows in records.values())
+        summary.notes_files = len(notes_papers)
+        return summary
 
-    def data_load(self):
-        for paper in self.paper_dict.values():
+    @instrumented('data_load')
+    def data_load(self, summary: bool = True) -> dict[int, str]:
+        # one bulk read from the store; lazy handles keep their records until first access.
+        # Returns the papers whose citation key is already used by another paper, those keys stay with the first owner
+        records = self.store.load(self.paper_dict.keys())
+        key_conflicts: dict[int, str] = {}
+        for paper_id, paper in self.paper_dict.items():
             assert isinstance(paper, Paper)
-            paper.data_load()
+            if paper_id in records:
+                self._unindex_paper(paper_id)
+                if isinstance(paper, LazyPaper) and not paper.hydrated:
+                    paper.records = records[paper_id]
+                else:
+                    paper.load_records(records[paper_id])
+                self._index_paper(paper_id, key_conflicts)
+        if summary:
+            for paper_id, key in key_conflicts.items():
+                print(f'Warning: paper {paper_id} has the citation key {key}, which is already used by paper {self.key_index.get(key)}.')
+        return key_conflicts
+
+    @instrumented('save_snapshot')
+    def save_snapshot(self) -> int:
+        # flush pending changes first, the snapshot has to describe exactly what is on disk;
+        # any later save or change to papers/ makes it stale until it is written again.
+        # Returns the bytes written, 0 for a store that cannot be fingerprinted: such a snapshot could never be validated
+        self.data_save()
+        directory_state = directory_fingerprint(self.papers_loc, self.store)
+        if directory_state is None:
+            return 0
+        records = {}
+        unloaded = []
+        for paper_id, paper in self.paper_dict.items():
+            if isinstance(paper, LazyPaper) and not paper.hydrated:
+                if paper.records is None:
+                    unloaded.append(paper_id)
+                else:
+                    records[paper_id] = paper.records
+            elif paper.bibtex is not None:
+                records[paper_id] = paper.to_records()
+            else:
+                records[paper_id] = []
+        stored = self.store.load(unloaded)
+        for paper_id in unloaded:
+            records[paper_id] = stored.get(paper_id, [])
+        return write_snapshot(self.snapshot_loc, directory_state, self.paper_no, records)
+
+    @instrumented('load_snapshot')
+    def load_snapshot(self) -> bool:
+        # False when the snapshot is missing or stale, or the store cannot be fingerprinted; the organizer is then left untouched
+        if self.paper_dict != {}:
+            raise ValueError('A snapshot can only be loaded into an empty organizer.')
+        snapshot = read_snapshot(self.snapshot_loc, directory_fingerprint(self.papers_loc, self.store))
+        if snapshot is None:
+            return False
+        paper_no, records = snapshot
+        for paper_id, rows in records.items():
+            if self.lazy:
+                paper = LazyPaper(self.collection_loc, paper_id, store=self.store, records=rows,
+                                  key_index=self.key_index, notes_cache=self.notes_cache)
+            else:
+                paper = Paper(self.collection_loc, paper_id, key_index=self.key_index, notes_cache=self.notes_cache)
+                if rows != []:
+                    paper.load_records(rows)
+            self.paper_dict[paper_id] = paper
+        for paper_id in records:
+            # clashing keys were already reported by the data_load the snapshot was taken after
+            self._index_paper(paper_id, {})
+        self.paper_no = max(self.paper_no, paper_no)
+        self._save_counter()
+        return True
+
+    def start_profiling(self, reset: bool = True) -> None:
+        # instrumentation is process wide: it covers every Organizer and Paper until stopped
+        instrumentation.enable(reset=reset)
+
+    def stop_profiling(self) -> None:
+        instrumentation.disable()
+
+    def profiling_stats(self) -> dict[str, dict[str, int | float]]:
+        return instrumentation.stats()
+
+    def add_trace_hook(self, hook) -> None:
+        # hook(operation, seconds, io) runs after every instrumented call while profiling
+        instrumentation.add_hook(hook)
+
+    def migrate_from_csv(self, overwrite: bool = False, summary: bool = True) -> int:
+        # one-time import of the legacy data/<id>.csv files into the current store
+        if isinstance(self.store, CSVStore):
+            raise ValueError('The organizer already uses the csv store, there is nothing to migrate.')
+        migrated = migrate_store(CSVStore(self.papers_data_loc), self.store, overwrite=overwrite)
+        if summary:
+            print(f'Migrated {migrated} papers from the csv files under {self.papers_data_loc}.')
+        return migrated
 
     def get_citation_key(self, indices: int | list[int]) -> str:
         if isinstance(indices, int):
@@ -182,63 +1036,95 @@ class Organizer():
         
     def get_name_from_citation_key(self, keys: str | list[str]) -> int | list[int]:
         if isinstance(keys, str):
-            found_name = None
-            for name, paper in self.paper_dict.items():
-                if paper.key == keys:
-                    found_name = int(paper.paper_id)
-                    break
+            found_name = self.key_index.get(keys)
             if found_name is not None:
                 return found_name
             else:
-                raise ValueError(f'{found_name} is not a valid key.')
+                raise ValueError(f'{keys} is not a valid key.')
         else:
             name_list = []
             for key in keys:
-                found_name = None
-                for name, paper in self.paper_dict.items():
-                    if paper.key == key:
-                        found_name = int(paper.paper_id)
-                        break
+                found_name = self.key_index.get(key)
                 if found_name is not None:
                     name_list.append(found_name)
                 else:
-                    raise ValueError(f'{found_name} is not a valid key.')
+                    raise ValueError(f'{key} is not a valid key.')
             return name_list
-        
-    def get_citation_bib(self) -> str:
-        bib = ''
-        for name, paper in self.paper_dict.items():
-            assert paper.bibtex is not None
-            bib += paper.bibtex + '\n'
-
-        return bib
 
-    def print_info(self, indices: list[int] | int | None = None):
-        info = ''
+    def resolve_citations(self, tex_loc: str, strict: bool = True) -> dict[str, int]:
+        # collect every key cited in a .tex file (\cite, \citep, \parencite, ...) or a .aux file (\citation)
+        with open(tex_loc, 'r', encoding='utf-8') as file:
+            text = file.read()
+        keys = {}
+        for group in citation_pattern.findall(text):
+            for key in group.split(','):
+                key = key.strip()
+                if key != '' and key != '*':
+                    keys[key] = None
 
+        resolved = {}
+        unknown_keys = []
+        for key in keys:
+            found_name = self.key_index.get(key)
+            if found_name is not None:
+                resolved[key] = found_name
+            else:
+                unknown_keys.append(key)
+        if unknown_keys != []:
+            if strict:
+                raise ValueError(f'{unknown_keys} are not valid keys.')
+            print(f'Warning: {len(unknown_keys)} cited keys are not in the collection: {", ".join(unknown_keys)}')
+        return resolved
+        
+    def _select_ids(self, indices: list[int] | int | None, offset: int = 0, limit: Optional[int] = None) -> Iterator[int]:
+        # papers in id order unless indices are given; ids need not be contiguous
         if indices is None:
-            for i in range(1, self.paper_no + 1):
-                info += f'{i}: \n{self.paper_dict[i].__str__()}'
-                if not 'bibtex' in self.paper_dict[i].active_attrs:
-                    info += f'Warning: This paper does not have a bibtex.\n'
-                info += '\n\n'
+            ids: Iterable[int] = sorted(self.paper_dict)
         elif isinstance(indices, int):
-            info += f'{indices}: \n{self.paper_dict[indices].__str__()}'
-            if not 'bibtex' in self.paper_dict[indices].active_attrs:
-                info += f'Warning: This paper does not have a bibtex.\n'
-            info += '\n\n'
+            ids = [indices]
         else:
-            for i in indices:
-                info += f'{i}: \n{self.paper_dict[i].__str__()}'
-                if not 'bibtex' in self.paper_dict[i].active_attrs:
-                    info += f'Warning: This paper does not have a bibtex.\n'
-                info += '\n\n'
-        print(info)
+            ids = indices
+        return islice(ids, offset, None if limit is None else offset + limit)
+
+    def iter_citation_bib(self, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        for i in self._select_ids(indices, offset, limit):
+            paper = self.paper_dict[i]
+            assert paper.bibtex is not None
+            yield paper.bibtex + '\n'
+
+    def write_citation_bib(self, file: TextIO, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None) -> int:
+        # streams the .bib export entry by entry, returns the number of entries written
+        written = 0
+        for chunk in self.iter_citation_bib(indices, offset, limit):
+            file.write(chunk)
+            written += 1
+        return written
+
+    def get_citation_bib(self, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None) -> str:
+        return ''.join(self.iter_citation_bib(indices, offset, limit))
+
+    def iter_info(self, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        for i in self._select_ids(indices, offset, limit):
+            paper = self.paper_dict[i]
+            yield f'{i}: \n{paper.__str__()}'
+            if not 'bibtex' in paper.active_attrs:
+                yield f'Warning: This paper does not have a bibtex.\n'
+            yield '\n\n'
+
+    def write_info(self, file: TextIO, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None) -> None:
+        for chunk in self.iter_info(indices, offset, limit):
+            file.write(chunk)
+
+    def print_info(self, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None):
+        self.write_info(sys.stdout, indices, offset, limit)
+        sys.stdout.write('\n')
+
+    def iter_summary(self, indices: list[int] | int | None = None, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        for i in self._select_ids(indices, offset, limit):
+            paper = self.paper_dict[i]
+            yield f"{i}: Paper Title: {paper.title if 'bibtex' in paper.active_attrs else None}\n"
+            if not 'bibtex' in paper.active_attrs:
+                yield f'Warning: This paper does not have a bibtex.\n'
 
     def __str__(self) -> str:
-        info = ''
-        for i in range(1, self.paper_no + 1):
-            info += f"{i}: Paper Title: {self.paper_dict[i].title if 'bibtex' in self.paper_dict[i].active_attrs else None}\n"
-            if not 'bibtex' in self.paper_dict[i].active_attrs:
-                info += f'Warning: This paper does not have a bibtex.\n'
-        return info
\ No newline at end of file
+        return ''.join(self.iter_summary())
@@ -1,67 +1,130 @@
 import os
-import re
-from typing import Optional
+import sys
+from typing import Iterable, Iterator, Optional
 
-import pandas as pd
+from .CONSTANT import safe_categories, safe_attrs, possible_entries, required_fields, optional_fields, all_items
+from .index import CitationKeyIndex
+from .bibtex import parse_entry, validate_entry
+from .storage import CatalogStore, atomic_write
+from .notes import NotesCache, default_notes_cache
+from .instrument import instrumentation, instrumented
 
-from .CONSTANT import safe_categories, safe_attrs, possible_entries, required_fields, optional_fields
+
+# every attribute a paper can carry gets a fixed bit in Paper._active_mask
+attr_names: list[str] = sorted(set(safe_attrs))
+attr_bits: dict[str, int] = {name: 1 << i for i, name in enumerate(attr_names)}
+
+
+class ActiveAttrs():
+    # set-like view over the bitmask that replaces the per-paper set of active attribute names
+
+    __slots__ = ('paper',)
+
+    def __init__(self, paper: 'Paper') -> None:
+        self.paper = paper
+
+    def __contains__(self, attr: str) -> bool:
+        return self.paper._active_mask & attr_bits.get(attr, 0) != 0
+
+    def add(self, attr: str) -> None:
+        self.paper._active_mask |= attr_bits[attr]
+
+    def discard(self, attr: str) -> None:
+        self.paper._active_mask &= ~attr_bits.get(attr, 0)
+
+    def __iter__(self) -> Iterator[str]:
+        mask = self.paper._active_mask
+        return (name for name in attr_names if mask & attr_bits[name])
+
+    def __len__(self) -> int:
+        return bin(self.paper._active_mask).count('1')
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ActiveAttrs, set, frozenset)):
+            return set(self) == set(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(set(self))
 
 
 class Paper():
 
+    # fixed slots instead of a per-instance __dict__, one for each known bibtex field from CONSTANT.py
+    __slots__ = ('paper_loc', 'notes_loc', 'paper_id', 'key_index', 'notes_cache', 'bibtex',
+                 '_active_mask', 'category', 'keywords', 'relations', 'dirty', 'notes_dirty', 'notes', 'entry') + tuple(sorted(all_items))
+
     def __init__(self, 
                  loc: str,
                  paper_id: str | int,
-                 bibtex: Optional[str] = None) -> None:
+                 bibtex: Optional[str] = None,
+                 key_index: Optional[CitationKeyIndex] = None,
+                 notes_cache: Optional[NotesCache] = None) -> None:
         
         # link paper pdf
-        self.paper_loc: str = loc + '\\papers\\' + str(paper_id) + '_registered.pdf'
+        self.paper_loc: str = os.path.join(loc, 'papers', f'{paper_id}_registered.pdf')
         if not os.path.exists(self.paper_loc):
             raise ValueError(f'{paper_id}.pdf is not in the {loc} folder.')
 
-        # link csv to Paper object data storage
-        self.datasave_loc: str = loc + '\\data\\' + str(paper_id) + '.csv'
-        if not os.path.exists(self.datasave_loc):
-            df = pd.DataFrame([], columns=['attribute name', 'attribute data'])
-            df.to_csv(self.datasave_loc, index=False)
-
         # link txt for notes
-        self.notes_loc: str = loc + '\\notes\\' + str(paper_id) + '.txt'
+        self.notes_loc: str = os.path.join(loc, 'notes', f'{paper_id}.txt')
         if not os.path.exists(self.notes_loc):
             with open(self.notes_loc, 'w'):
                 pass
+            instrumentation.record_io(opened=1)
         
         self.paper_id: str | int = paper_id
+        self.key_index: Optional[CitationKeyIndex] = key_index
+        self.notes_cache: NotesCache = notes_cache if notes_cache is not None else default_notes_cache
         self.title: Optional[str] = None
         self.bibtex: Optional[str] = None
-        self.active_attrs: set[str] = set(['paper_id'])
+        self._active_mask: int = attr_bits['paper_id']
         if bibtex is not None:
             self.set_bibtex(bibtex)
         self.category: Optional[str] = None
         self.keywords: list[str] = []
         self.relations: list[list[str]] = []
+        # set by the mutators, cleared once the paper has been written out
+        self.dirty: bool = bibtex is not None
+        self.notes_dirty: bool = False
         self.update_notes()
 
-    def set_bibtex(self, bibtex: str) -> None:
+    @property
+    def active_attrs(self) -> ActiveAttrs:
+        return ActiveAttrs(self)
+
+    @active_attrs.setter
+    def active_attrs(self, attrs: Iterable[str]) -> None:
+        mask = 0
+        for attr in attrs:
+            mask |= attr_bits[attr]
+        self._active_mask = mask
+
+    def set_bibtex(self, bibtex: str, entry: Optional[dict[str, str]] = None) -> None:
+        if entry is None:
+            entry = parse_entry(bibtex)
+        # refuse an invalid entry or a key owned by another paper before anything is overwritten,
+        # so a rejected bibtex neither changes the paper nor reserves its key
+        errors = validate_entry(entry)
+        if errors != []:
+            raise ValueError(' '.join(errors))
+        if self.key_index is not None:
+            self.key_index.check(entry['key'], int(self.paper_id))
         if self.bibtex is not None:
             print(f'Warning, bibtex for paper {self.paper_id} has been overwrited. The while object has been re-initialized.')
         self.bibtex = bibtex
         self.active_attrs = set(['paper_id', 'bibtex'])
-        self._bibtex2attr()
+        self.dirty = True
+        self._bibtex2attr(entry)
 
-    def _bibtex2attr(self) -> None:
-        entry_pattern = re.compile(r'@(?P<entry_type>\w+)\s*{\s*(?P<key>[^,]+),\s*(?P<content>.+)\s*}\s*,?', re.DOTALL)
-        field_pattern = re.compile(r'\s*(?!,\r\n)(?!,\n)(?P<field>[^=]+)\s*=\s*{(?P<value>[^{}]+)}')
-
-        assert self.bibtex is not None
-        match = entry_pattern.findall(self.bibtex)[0]
-        entry = {'entry_type': match[0], 'key': match[1]}
-        fields = field_pattern.findall(match[2])
-        for field, value in fields:
-            entry[field.strip()] = value.strip()
+    @instrumented('_bibtex2attr')
+    def _bibtex2attr(self, entry: Optional[dict[str, str]] = None) -> None:
+        if entry is None:
+            assert self.bibtex is not None
+            entry = parse_entry(self.bibtex)
 
         if entry['entry_type'] in possible_entries:
-            self.entry: str = entry['entry_type']
+            self.entry: str = sys.intern(entry['entry_type'])
             self.active_attrs.add('entry')
             self.key: str = entry['key']
             self.active_attrs.add('key')
@@ -81,6 +144,8 @@ class Paper():
             remaining_required_fields = set(required_fields[self.entry]) - set(check_list)
             if remaining_required_fields != set():
                 raise ValueError(f"{remaining_required_fields} is not included in the bibtex.")
+            if self.key_index is not None:
+                self.key_index.assign(entry['key'], int(self.paper_id))
         else:
             raise ValueError(f"{entry['entry_type']} is not a valid entry type in bibtex.")
     
@@ -88,11 +153,10 @@ class Paper():
         if self.bibtex is None:
             raise ValueError('You have not assigned a bibtex yet. Use .set_bibtex() to set the bibtex first.')
 
+    @instrumented('update_notes')
     def update_notes(self) -> None:
-        with open(self.notes_loc, 'r') as file:
-            notes = file.read()
-        notes = notes.split("THIS IS A SPLIT LINE\n")
-        self.notes = [note.rstrip('\n') for note in notes if (note.strip() != '') and (not note.startswith('RELATION '))]
+        # only re-parsed when the file changed on disk since it was last read
+        self.notes = self.notes_cache.get(self.notes_loc)
 
     def set_category(self, cat: str) -> None:
         self.check_bibtex_exist()
@@ -100,76 +164,94 @@ class Paper():
         if cat in safe_categories:
             self.category = cat
             self.active_attrs.add('category')
+            self.dirty = True
         else:
             raise ValueError(f'{cat} is not a valid cateogry type. Please use category from {safe_categories}')
 
-    def add_keyword(self, keyword: str) -> None:
+    def add_keyword(self, keyword: str, summary: bool = True) -> None:
         self.check_bibtex_exist()
         if keyword not in self.keywords:
-            self.keywords.append(keyword)
+            self.keywords.append(sys.intern(keyword))
+            self.dirty = True
         else:
-            print(f'No Action: the keyword {keyword} has already been added to paper: {self.title}.')
+            if summary:
+                print(f'No Action: the keyword {keyword} has already been added to paper: {self.title}.')
         self.active_attrs.add('keywords')
 
-    def del_keyword(self, keyword: str) -> None:
+    def del_keyword(self, keyword: str, summary: bool = True) -> None:
         self.check_bibtex_exist()
         if keyword in self.keywords:
             self.keywords.remove(keyword)
+            self.dirty = True
         else:
-            print(f'No Action: the keyword {keyword} is not an keyword of the paper: {self.title}.')
+            if summary:
+                print(f'No Action: the keyword {keyword} is not an keyword of the paper: {self.title}.')
     
-    def add_relation(self, another_paper: str | int, relation: str, note: str) -> None:
+    def add_relation(self, another_paper: str | int, relation: str, note: str, summary: bool = True, check: bool = True) -> None:
         self.check_bibtex_exist()
         # relation should not include any underscore (_)
-        if [str(another_paper), relation, note] not in self.relations:
-            self.relations.append([str(another_paper), relation, note])
+        # check=False skips the linear duplicate scan, for callers that already know the relation is new
+        if not check or [str(another_paper), relation, note] not in self.relations:
+            self.relations.append([sys.intern(str(another_paper)), sys.intern(relation), note])
+            self.dirty = True
+            self.notes_dirty = True
         else:
-            print(f'No Action: the relation from {self.paper_id} to {another_paper} with relation type `{relation}` has already been added to paper: {self.title}.')
+            if summary:
+                print(f'No Action: the relation from {self.paper_id} to {another_paper} with relation type `{relation}` has already been added to paper: {self.title}.')
         self.active_attrs.add('relations')
     
-    def data_save(self) -> None:
+    def to_records(self) -> list[tuple[str, str]]:
         self.check_bibtex_exist()
-        # replace local csv data with class data, the opposite of data_update
-        df_data = []
+        records = []
         for attr in self.active_attrs:
             if attr == 'keywords':
-                df_data.append(['keywords', ','.join(self.keywords)])
+                records.append(('keywords', ','.join(self.keywords)))
             elif attr == 'relations':
                 for relation in self.relations:
-                    df_data.append(['relations', '_'.join(relation)])
+                    records.append(('relations', '_'.join(relation)))
             else:
-                df_data.append([attr, getattr(self, attr)])
-        df = pd.DataFrame(df_data, columns=['attribute name', 'attribute data'])
-        df.to_csv(self.datasave_loc, index=False)
+                records.append((attr, str(getattr(self, attr))))
+        return records
 
-        # also tidy up notes in text
-        self.update_notes()
-        with open(self.notes_loc, 'w') as file:
-            # write in actual notes
-            for note in self.notes:
-                file.write(note + '\n')
-                file.write("THIS IS A SPLIT LINE\n")
-            # write in relations
-            for relation, another_paper, note in self.relations:
-                file.write(f'RELATION {relation} to {another_paper}: {note}\n')
-                file.write("THIS IS A SPLIT LINE\n")
-    
-    def data_load(self) -> None:
-        # replace class data with local csv data, the opposite of data_update
+    def load_records(self, records: list[tuple[str, str]]) -> None:
         self.active_attrs = set(['paper_id'])
-        df = pd.read_csv(self.datasave_loc)
-        for _, row in df.iterrows():
-            attr = row['attribute name']
-            info = row['attribute data']
+        # these slots are read without checking active_attrs, so values from before the load must not survive it
+        self.title = None
+        self.bibtex = None
+        self.category = None
+        self.keywords = []
+        self.relations = []
+        for attr, info in records:
             assert attr in safe_attrs, f'{attr} is not a legal property for a paper'
             if attr == 'keywords':
-                self.keywords = info.split(',')
+                self.keywords = [sys.intern(keyword) for keyword in info.split(',')] if info != '' else []
             elif attr == 'relations':
                 splits = info.split('_')
-                self.relations.append([splits[0], splits[1], '_'.join(splits[2:])])
-            else:
+                self.relations.append([sys.intern(splits[0]), sys.intern(splits[1]), '_'.join(splits[2:])])
+            elif attr == 'entry':
+                self.entry = sys.intern(info)
+            elif attr != 'paper_id':
                 setattr(self, attr, info)
             self.active_attrs.add(attr)
+        self.dirty = False
+        self.notes_dirty = False
+
+    def notes_save(self) -> int:
+        # tidy up notes in text, returns the number of bytes written
+        self.update_notes()
+        lines = []
+        # write in actual notes
+        for note in self.notes:
+            lines.append(note + '\n')
+            lines.append("THIS IS A SPLIT LINE\n")
+        # write in relations
+        for relation, another_paper, note in self.relations:
+            lines.append(f'RELATION {relation} to {another_paper}: {note}\n')
+            lines.append("THIS IS A SPLIT LINE\n")
+        bytes_written = atomic_write(self.notes_loc, ''.join(lines))
+        self.notes_cache.put(self.notes_loc, self.notes)
+        self.notes_dirty = False
+        return bytes_written
 
     def show_notes(self) -> None:
         self.update_notes()
@@ -197,4 +279,54 @@ class Paper():
                 relations_info += f'{relation} to {another_paper}: {note}\n'
             info += "\nRelations:\n" + relations_info
 
-        return info
\ No newline at end of file
+        return info
+
+class LazyPaper(Paper):
+    # lightweight handle for fast startup: only the id and file locations are set up front,
+    # bibtex fields, keywords, relations and notes are loaded on first access to any of them
+
+    __slots__ = ('store', 'records', 'hydrated')
+
+    def __init__(self,
+                 loc: str,
+                 paper_id: int,
+                 store: Optional[CatalogStore] = None,
+                 records: Optional[list[tuple[str, str]]] = None,
+                 key_index: Optional[CitationKeyIndex] = None,
+                 notes_cache: Optional[NotesCache] = None) -> None:
+        self.paper_loc: str = os.path.join(loc, 'papers', f'{paper_id}_registered.pdf')
+        self.notes_loc: str = os.path.join(loc, 'notes', f'{paper_id}.txt')
+        self.paper_id: str | int = paper_id
+        self.key_index: Optional[CitationKeyIndex] = key_index
+        self.notes_cache: NotesCache = notes_cache if notes_cache is not None else default_notes_cache
+        self.store: Optional[CatalogStore] = store
+        self.records: Optional[list[tuple[str, str]]] = records
+        self.dirty: bool = False
+        self.notes_dirty: bool = False
+        self.hydrated: bool = False
+
+    def __getattr__(self, name: str):
+        # only called for attributes that are not set yet
+        if name.startswith('__') or name == 'hydrated' or self.hydrated:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self.hydrate()
+        return getattr(self, name)
+
+    def hydrate(self) -> None:
+        self.hydrated = True
+        self.title = None
+        self.bibtex = None
+        self.active_attrs = set(['paper_id'])
+        self.category = None
+        self.keywords = []
+        self.relations = []
+        records = self.records
+        if records is None and self.store is not None:
+            records = self.store.load([int(self.paper_id)]).get(int(self.paper_id))
+        if records is not None:
+            self.load_records(records)
+        self.records = None
+        if not os.path.exists(self.notes_loc):
+            with open(self.notes_loc, 'w'):
+                pass
+        self.update_notes()
@@ -0,0 +1,60 @@
+import io
+import json
+import os
+import pickle
+import struct
+from typing import Optional
+
+from .instrument import instrumentation
+from .storage import CatalogStore, Records, atomic_write
+
+
+SNAPSHOT_MAGIC = b'PAPERORG'
+SNAPSHOT_VERSION = 1
+
+# magic, format version, length of the fingerprint that follows the header
+_header = struct.Struct('>8sHI')
+
+
+def directory_fingerprint(papers_loc: str, store: CatalogStore) -> Optional[list[int]]:
+    # adding, removing or renaming a pdf changes the mtime of papers/, every committed save changes the store;
+    # notes are not part of the snapshot, they keep being read through the notes cache
+    store_fingerprint = store.fingerprint()
+    if store_fingerprint is None:
+        return None
+    return [os.stat(papers_loc).st_mtime_ns] + store_fingerprint
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    # the payload is only dicts, lists, tuples, strings and ints, which never go through find_class
+
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed in a catalog snapshot.')
+
+
+def write_snapshot(snapshot_loc: str, fingerprint: list[int], paper_no: int, records: dict[int, Records]) -> int:
+    # records maps every registered paper id to its store rows, [] for papers without bibtex yet
+    fingerprint_bytes = json.dumps(fingerprint).encode('utf-8')
+    payload = pickle.dumps({'paper_no': paper_no, 'records': records}, protocol=pickle.HIGHEST_PROTOCOL)
+    data = _header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(fingerprint_bytes)) + fingerprint_bytes + payload
+    return atomic_write(snapshot_loc, data)
+
+
+def read_snapshot(snapshot_loc: str, fingerprint: Optional[list[int]]) -> Optional[tuple[int, dict[int, Records]]]:
+    # None when there is no usable snapshot: missing, another format version, stale or unreadable
+    if fingerprint is None or not os.path.exists(snapshot_loc):
+        return None
+    with open(snapshot_loc, 'rb') as file:
+        data = file.read()
+    instrumentation.record_io(opened=1, read=len(data))
+    try:
+        magic, version, fingerprint_length = _header.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            return None
+        start = _header.size + fingerprint_length
+        if json.loads(data[_header.size:start]) != fingerprint:
+            return None
+        payload = _PlainUnpickler(io.BytesIO(memoryview(data)[start:])).load()
+        return int(payload['paper_no']), payload['records']
+    except (struct.error, ValueError, KeyError, TypeError, EOFError, pickle.UnpicklingError):
+        return None
@@ -0,0 +1,250 @@
+import os
+import sqlite3
+import secrets
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from .instrument import instrumentation
+
+
+Records = list[tuple[str, str]]
+
+def atomic_write(path: str, text: str | bytes) -> int:
+    # write next to the target, fsync, then rename over it, so readers never see a half-written file
+    # and a crash or power loss leaves either the old or the new content
+    directory, name = os.path.split(path)
+    directory = directory if directory != '' else '.'
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    tmp_path = os.path.join(directory, f'.{name}.{secrets.token_hex(8)}.tmp')
+    # created with 0o666 so the umask applies, the same permissions a plain open() would have given
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode)
+        os.replace(tmp_path, path)
+        instrumentation.record_io(opened=1, written=len(data))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # the rename itself is only durable once the directory entry is on disk
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return len(data)
+
+
+class SaveSummary():
+
+    def __init__(self) -> None:
+        self.papers: int = 0
+        self.records: int = 0
+        self.notes_files: int = 0
+        self.bytes_written: int = 0
+
+    def __str__(self) -> str:
+        return (f'Saved {self.papers} papers ({self.records} records) and {self.notes_files} notes files, '
+                f'{self.bytes_written} bytes written.')
+
+
+class CatalogStore(ABC):
+    # one paper is stored as a list of (attribute name, attribute data) rows,
+    # the same two columns the per-paper csv files have always used
+
+    @abstractmethod
+    def load(self, paper_ids: Optional[Iterable[int]] = None) -> dict[int, Records]:
+        ...
+
+    @abstractmethod
+    def save(self, records: dict[int, Records]) -> int:
+        # returns the number of bytes written
+        ...
+
+    @abstractmethod
+    def delete(self, paper_ids: Iterable[int]) -> None:
+        ...
+
+    @abstractmethod
+    def paper_ids(self) -> list[int]:
+        ...
+
+    @abstractmethod
+    def load_counter(self) -> int:
+        # the highest paper id ever handed out, 0 for a new store
+        ...
+
+    @abstractmethod
+    def save_counter(self, paper_no: int) -> None:
+        ...
+
+    def fingerprint(self) -> Optional[list[int]]:
+        # cheap stat-based value that changes whenever the stored data changes, None if the store cannot tell
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class CSVStore(CatalogStore):
+    # legacy layout: one csv per paper under data/<id>.csv
+
+    def __init__(self, data_loc: str) -> None:
+        self.data_loc: str = data_loc
+        if not os.path.exists(self.data_loc):
+            os.makedirs(self.data_loc)
+
+    def _csv_loc(self, paper_id: int) -> str:
+        return os.path.join(self.data_loc, f'{paper_id}.csv')
+
+    def load(self, paper_ids: Optional[Iterable[int]] = None) -> dict[int, Records]:
+        if paper_ids is None:
+            paper_ids = self.paper_ids()
+        records = {}
+        for paper_id in paper_ids:
+            csv_loc = self._csv_loc(paper_id)
+            if not os.path.exists(csv_loc):
+                continue
+            df = pd.read_csv(csv_loc, dtype=str, keep_default_na=False)
+            instrumentation.record_io(opened=1, read=os.path.getsize(csv_loc))
+            records[paper_id] = list(zip(df['attribute name'], df['attribute data']))
+        return records
+
+    def save(self, records: dict[int, Records]) -> int:
+        bytes_written = 0
+        for paper_id, rows in records.items():
+            df = pd.DataFrame(rows, columns=['attribute name', 'attribute data'])
+            bytes_written += atomic_write(self._csv_loc(paper_id), df.to_csv(index=False))
+        return bytes_written
+
+    def delete(self, paper_ids: Iterable[int]) -> None:
+        for paper_id in paper_ids:
+            csv_loc = self._csv_loc(paper_id)
+            if os.path.exists(csv_loc):
+                os.remove(csv_loc)
+
+    def paper_ids(self) -> list[int]:
+        paper_ids = []
+        with os.scandir(self.data_loc) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext == '.csv' and name.isdigit():
+                    paper_ids.append(int(name))
+        return sorted(paper_ids)
+
+    def load_counter(self) -> int:
+        counter_loc = os.path.join(self.data_loc, 'paper_no.txt')
+        if not os.path.exists(counter_loc):
+            return 0
+        with open(counter_loc, 'r', encoding='utf-8') as file:
+            return int(file.read().strip() or 0)
+
+    def save_counter(self, paper_no: int) -> None:
+        atomic_write(os.path.join(self.data_loc, 'paper_no.txt'), str(paper_no))
+
+    def fingerprint(self) -> Optional[list[int]]:
+        # every save renames a csv into data/, which bumps the directory mtime; the organizer keeps its
+        # other sqlite files out of data/ so that their journals do not
+        return [os.stat(self.data_loc).st_mtime_ns]
+
+
+class SQLiteStore(CatalogStore):
+    # the whole catalog in a single sqlite file, read and written in one transaction
+
+    def __init__(self, db_loc: str) -> None:
+        self.db_loc: str = db_loc
+        # the watcher saves from its own thread, callers serialise access through its lock
+        self.conn = sqlite3.connect(self.db_loc, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS attributes ('
+            'paper_id INTEGER NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, data TEXT NOT NULL, '
+            'PRIMARY KEY (paper_id, position))'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self.conn.commit()
+
+    def load(self, paper_ids: Optional[Iterable[int]] = None) -> dict[int, Records]:
+        if paper_ids is None:
+            cursor = self.conn.execute('SELECT paper_id, name, data FROM attributes ORDER BY paper_id, position')
+        else:
+            paper_ids = list(paper_ids)
+            if paper_ids == []:
+                return {}
+            placeholders = ','.join('?' * len(paper_ids))
+            cursor = self.conn.execute(
+                f'SELECT paper_id, name, data FROM attributes WHERE paper_id IN ({placeholders}) ORDER BY paper_id, position',
+                paper_ids,
+            )
+        records: dict[int, Records] = {}
+        bytes_read = 0
+        for paper_id, name, data in cursor:
+            records.setdefault(paper_id, []).append((name, data))
+            bytes_read += len(name) + len(data)
+        instrumentation.record_io(read=bytes_read)
+        return records
+
+    def save(self, records: dict[int, Records]) -> int:
+        rows = [(paper_id, position, name, str(data))
+                for paper_id, paper_rows in records.items()
+                for position, (name, data) in enumerate(paper_rows)]
+        # one transaction, so an interrupted save leaves the previous catalog intact
+        with self.conn:
+            self.conn.executemany('DELETE FROM attributes WHERE paper_id = ?', [(paper_id,) for paper_id in records])
+            self.conn.executemany('INSERT INTO attributes (paper_id, position, name, data) VALUES (?, ?, ?, ?)', rows)
+        bytes_written = sum(len(name.encode('utf-8')) + len(data.encode('utf-8')) for _, _, name, data in rows)
+        instrumentation.record_io(written=bytes_written)
+        return bytes_written
+
+    def delete(self, paper_ids: Iterable[int]) -> None:
+        with self.conn:
+            self.conn.executemany('DELETE FROM attributes WHERE paper_id = ?', [(paper_id,) for paper_id in paper_ids])
+
+    def paper_ids(self) -> list[int]:
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT paper_id FROM attributes ORDER BY paper_id')]
+
+    def load_counter(self) -> int:
+        row = self.conn.execute("SELECT value FROM counters WHERE name = 'paper_no'").fetchone()
+        return row[0] if row is not None else 0
+
+    def save_counter(self, paper_no: int) -> None:
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO counters (name, value) VALUES ('paper_no', ?)", (paper_no,))
+
+    def fingerprint(self) -> Optional[list[int]]:
+        stat = os.stat(self.db_loc)
+        with open(self.db_loc, 'rb') as file:
+            header = file.read(28)
+        # the file change counter in the database header is bumped by every committed write
+        counter = int.from_bytes(header[24:28], 'big') if len(header) == 28 else 0
+        return [stat.st_size, stat.st_mtime_ns, counter]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def open_store(data_loc: str, backend: str = 'sqlite') -> CatalogStore:
+    if backend == 'sqlite':
+        return SQLiteStore(os.path.join(data_loc, 'catalog.sqlite'))
+    elif backend == 'csv':
+        return CSVStore(data_loc)
+    else:
+        raise ValueError(f'{backend} is not a valid storage backend. Please use one of {["sqlite", "csv"]}')
+
+
+def migrate_store(source: CatalogStore, target: CatalogStore, overwrite: bool = False) -> int:
+    # one-time copy of every paper record, e.g. from the per-paper csv files into sqlite
+    records = source.load()
+    if not overwrite:
+        existing = set(target.paper_ids())
+        records = {paper_id: rows for paper_id, rows in records.items() if paper_id not in existing}
+    target.save(records)
+    target.save_counter(max(target.load_counter(), source.load_counter()))
+    return len(records)
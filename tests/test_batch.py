@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from ..organizer import Organizer
+
+
+def make_organizer(collection_loc: str, size: int = 4) -> Organizer:
+    os.makedirs(os.path.join(collection_loc, 'papers'))
+    for paper_id in range(1, size + 1):
+        with open(os.path.join(collection_loc, 'papers', f'{paper_id}_registered.pdf'), 'wb') as file:
+            file.write(b'pdf %d' % paper_id)
+    organizer = Organizer(collection_loc)
+    organizer.auto_add_papers(summary=False)
+    for paper_id in range(1, size + 1):
+        organizer.set_paper_bibtex(paper_id, '@article{key%d, title={Title %d}, author={Author}, year={2020}}' % (paper_id, paper_id))
+    organizer.add_keyword([1, 2], 'graphs', summary=False)
+    organizer.add_relation([[1, 2, False, 'cites', 'first']], summary=False)
+    organizer.data_save()
+    return organizer
+
+
+def paper_state(organizer: Organizer) -> dict:
+    state = {}
+    for paper_id, paper in organizer.paper_dict.items():
+        state[paper_id] = (paper.to_records(), paper.title, paper.category, list(paper.keywords),
+                           [list(relation) for relation in paper.relations], paper.dirty, paper.notes_dirty)
+    return state
+
+
+def index_state(organizer: Organizer) -> tuple:
+    keywords = {keyword: sorted(organizer.keyword_index.get(keyword)) for keyword in organizer.get_all_keyword()}
+    keys = {paper_id: organizer.get_citation_key(paper_id) for paper_id in organizer.paper_dict}
+    return keywords, keys, {edge: list(notes) for edge, notes in organizer.relation_graph.notes.items()}
+
+
+def test_failed_batch_restores_every_field(tmp_path, monkeypatch):
+    organizer = make_organizer(str(tmp_path))
+    papers_before = paper_state(organizer)
+    indices_before = index_state(organizer)
+
+    apply_operation = organizer._apply_operation
+    calls = []
+
+    def failing_apply(operation, paper_id, argument):
+        calls.append(operation)
+        if len(calls) == 6:
+            raise RuntimeError('injected failure')
+        return apply_operation(operation, paper_id, argument)
+
+    monkeypatch.setattr(organizer, '_apply_operation', failing_apply)
+    with pytest.raises(RuntimeError):
+        organizer.apply_batch([
+            ([1, 2], 'add_category', 'survey'),
+            ([3], 'add_keyword', ['trees', 'graphs']),
+            ([1], 'del_keyword', 'graphs'),
+            ([3], 'add_relation', ([4], True, 'extends', 'note')),
+            ([4], 'add_keyword', 'never applied'),
+        ], summary=False)
+
+    assert len(calls) == 6
+    assert paper_state(organizer) == papers_before
+    assert index_state(organizer) == indices_before
+    for paper_id in [1, 2]:
+        assert organizer.paper_dict[paper_id].category is None
+        assert 'category' not in organizer.paper_dict[paper_id].active_attrs
+
+
+def test_category_applies_after_rollback(tmp_path, monkeypatch):
+    organizer = make_organizer(str(tmp_path))
+    apply_operation = organizer._apply_operation
+
+    def failing_apply(operation, paper_id, argument):
+        if operation == 'add_keyword':
+            raise RuntimeError('injected failure')
+        return apply_operation(operation, paper_id, argument)
+
+    monkeypatch.setattr(organizer, '_apply_operation', failing_apply)
+    with pytest.raises(RuntimeError):
+        organizer.apply_batch([(1, 'add_category', 'survey'), (1, 'add_keyword', 'trees')], summary=False)
+    monkeypatch.undo()
+
+    result = organizer.apply_batch([(1, 'add_category', 'survey')], summary=False)
+    assert result.changed['add_category'] == 1
+    organizer.store.close()
+
+    reopened = Organizer(str(tmp_path))
+    reopened.auto_add_papers(summary=False)
+    reopened.data_load(summary=False)
+    assert reopened.paper_dict[1].category == 'survey'
+    reopened.store.close()
+
+
+def test_invalid_batch_applies_nothing(tmp_path):
+    organizer = make_organizer(str(tmp_path))
+    papers_before = paper_state(organizer)
+    with pytest.raises(ValueError):
+        organizer.apply_batch([(1, 'add_keyword', 'trees'), (99, 'add_keyword', 'trees'), (2, 'add_category', 'bogus')],
+                              summary=False)
+    assert paper_state(organizer) == papers_before
+    organizer.store.close()
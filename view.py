@@ -0,0 +1,155 @@
+import re
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .CONSTANT import all_items
+from .paper import Paper, LazyPaper
+from .storage import CatalogStore, Records
+
+
+field_columns = ['entry'] + sorted(all_items)
+view_columns = field_columns + ['category', 'keyword_count', 'relation_count']
+_positions = {column: position for position, column in enumerate(view_columns)}
+
+
+def paper_row(paper: Paper, records: Optional[Records] = None) -> list:
+    # unhydrated lazy handles are read from their records, so building the view does not hydrate them
+    row: list = [None] * len(view_columns)
+    keyword_count = 0
+    relation_count = 0
+    if records is not None:
+        for attr, info in records:
+            if attr == 'keywords':
+                keyword_count = len(info.split(',')) if info != '' else 0
+            elif attr == 'relations':
+                relation_count += 1
+            elif attr in _positions:
+                row[_positions[attr]] = info
+    else:
+        for attr in paper.active_attrs:
+            if attr in _positions:
+                row[_positions[attr]] = getattr(paper, attr)
+        keyword_count = len(paper.keywords)
+        relation_count = len(paper.relations)
+    row[-2] = keyword_count
+    row[-1] = relation_count
+    return row
+
+
+class CatalogView():
+    # columnar copy of the catalog, one row per paper indexed by paper id. The organizer marks papers stale
+    # wherever it keeps its indices up to date; refresh only rebuilds those rows, so after the first build
+    # an edit costs one row, not a pass over the collection
+
+    def __init__(self) -> None:
+        self.frame: pd.DataFrame = pd.DataFrame(columns=view_columns, index=pd.Index([], dtype='int64', name='paper_id'))
+        self.ids: set[int] = set()
+        self.stale: set[int] = set()
+        # numeric years kept aligned with frame, NaN where the field is missing or not a number
+        self.years: pd.Series = pd.Series(dtype='float64', index=self.frame.index)
+        # lowercased authors joined into one string with the offset of each row, rebuilt after a change
+        self.author_text: Optional[tuple[str, np.ndarray]] = None
+
+    def mark(self, paper_ids: Iterable[int]) -> None:
+        self.stale.update(paper_ids)
+
+    def refresh(self, paper_dict: dict[int, Paper], store: Optional[CatalogStore] = None) -> pd.DataFrame:
+        if self.stale == set():
+            return self.frame
+        stale, self.stale = self.stale, set()
+        present = sorted(paper_id for paper_id in stale if paper_id in paper_dict)
+        removed = [paper_id for paper_id in stale if paper_id not in paper_dict and paper_id in self.ids]
+
+        # handles that were never given their records are read from the store in one go
+        unloaded = [paper_id for paper_id in present
+                    if isinstance(paper_dict[paper_id], LazyPaper) and not paper_dict[paper_id].hydrated
+                    and paper_dict[paper_id].records is None]
+        stored = store.load(unloaded) if store is not None and unloaded != [] else {}
+        rows = []
+        for paper_id in present:
+            paper = paper_dict[paper_id]
+            if isinstance(paper, LazyPaper) and not paper.hydrated:
+                records = paper.records if paper.records is not None else stored.get(paper_id, [])
+                rows.append(paper_row(paper, records))
+            else:
+                rows.append(paper_row(paper))
+        update = pd.DataFrame(rows, index=pd.Index(present, dtype='int64', name='paper_id'), columns=view_columns)
+        years = pd.to_numeric(update['year'], errors='coerce').astype('float64')
+
+        if self.ids == set():
+            self.frame = update
+            self.years = years
+        else:
+            # edited rows are overwritten in place; removals and additions copy the frame once per refresh
+            existing = [paper_id for paper_id in present if paper_id in self.ids]
+            added = [paper_id for paper_id in present if paper_id not in self.ids]
+            if existing != []:
+                self.frame.loc[existing] = update.loc[existing].to_numpy()
+                self.years.loc[existing] = years.loc[existing].to_numpy()
+            if removed != []:
+                keep = ~self.frame.index.isin(removed)
+                self.frame = self.frame[keep]
+                self.years = self.years[keep]
+            if added != []:
+                self.frame = pd.concat([self.frame, update.loc[added]])
+                self.years = pd.concat([self.years, years.loc[added]])
+                if not self.frame.index.is_monotonic_increasing:
+                    self.frame = self.frame.sort_index()
+                    self.years = self.years.sort_index()
+        self.ids.difference_update(removed)
+        self.ids.update(present)
+        self.author_text = None
+        return self.frame
+
+    def query(self,
+              entry: str | list[str] | None = None,
+              year_from: Optional[int] = None,
+              year_to: Optional[int] = None,
+              author: Optional[str] = None,
+              paper_ids: Optional[set[int]] = None,
+              category: Optional[str] = None) -> pd.DataFrame:
+        # every condition is a vectorized mask over the whole frame; author is a case-insensitive substring
+        frame = self.frame
+        mask = np.ones(len(frame), dtype=bool)
+        if paper_ids is not None:
+            mask &= frame.index.isin(list(paper_ids))
+        if entry is not None:
+            mask &= frame['entry'].isin([entry] if isinstance(entry, str) else entry).to_numpy()
+        if year_from is not None:
+            mask &= (self.years >= year_from).to_numpy()
+        if year_to is not None:
+            mask &= (self.years <= year_to).to_numpy()
+        if category is not None:
+            mask &= frame['category'].isin([category]).to_numpy()
+        if author is not None:
+            # one regex scan over the joined authors runs in C, matches are mapped back to rows by offset
+            text, offsets = self._author_text()
+            starts = [match.start() for match in re.finditer(re.escape(author.lower()), text)]
+            found = np.zeros(len(frame), dtype=bool)
+            found[np.searchsorted(offsets, starts, side='right') - 1] = True
+            mask &= found
+        return frame[mask]
+
+    def _author_text(self) -> tuple[str, np.ndarray]:
+        if self.author_text is None:
+            authors = [author.lower() if isinstance(author, str) else '' for author in self.frame['author'].to_numpy()]
+            lengths = np.fromiter((len(author) + 1 for author in authors), dtype=np.int64, count=len(authors))
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+            self.author_text = ('\x00'.join(authors), offsets)
+        return self.author_text
+
+    def sort(self, frame: pd.DataFrame, sort_by: str | list[str], ascending: bool = True) -> pd.DataFrame:
+        # years sort as numbers, every other column as text
+        def key(column: pd.Series) -> pd.Series:
+            return pd.to_numeric(column, errors='coerce') if column.name == 'year' else column
+        return frame.sort_values(sort_by, ascending=ascending, key=key, na_position='last')
+
+    def count_by(self, by: str | list[str], frame: Optional[pd.DataFrame] = None) -> pd.Series:
+        # 'venue' groups on the journal, falling back to the booktitle for conference papers
+        frame = self.frame if frame is None else frame
+        columns = [by] if isinstance(by, str) else by
+        if 'venue' in columns:
+            frame = frame.assign(venue=frame['journal'].fillna(frame['booktitle']))
+        return frame.groupby(columns).size().sort_values(ascending=False)
@@ -0,0 +1,231 @@
+import argparse
+import os
+import signal
+import threading
+import time
+from typing import Optional
+
+from .organizer import Organizer, registered_pattern
+
+
+class WatchEvents():
+
+    def __init__(self) -> None:
+        self.added: dict[str, int] = {}
+        self.loaded: list[int] = []
+        self.removed: list[int] = []
+        self.renamed: dict[str, str] = {}
+        self.rejected: dict[str, str] = {}
+        # steps of the poll that raised; whatever they did not finish is retried on the next poll
+        self.errors: list[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.loaded or self.removed or self.renamed or self.rejected or self.errors)
+
+    def __str__(self) -> str:
+        info = f'Watch: added {len(self.added)} new pdfs, loaded {len(self.loaded)} registered pdfs, removed {len(self.removed)} papers.'
+        for old_name, new_name in self.renamed.items():
+            info += f'\nRenamed {old_name} to {new_name}.'
+        for pdf_name, reason in self.rejected.items():
+            info += f'\nNot registered {pdf_name}: {reason}'
+        for error in self.errors:
+            info += f'\nError, will retry: {error}'
+        return info
+
+
+class Watcher():
+    # polls papers/ and feeds changes through Organizer.add_papers / add_paper / remove_paper.
+    # A poll first compares the directory mtime, so a quiet folder costs one stat; the folder is only
+    # listed again after an entry was added, removed or renamed, and only names not seen before are statted.
+    # New pdfs are registered once their size and mtime have been stable for `debounce` seconds, so
+    # half-copied files are left alone; every file that became ready in a poll is registered in one batch.
+    # An error in a poll is reported in its events and the work is retried on the next poll, the watcher keeps running.
+    # Hold `lock` when using the organizer from another thread while the watcher runs.
+
+    def __init__(self,
+                 organizer: Organizer,
+                 interval: float = 2.0,
+                 debounce: float = 1.0,
+                 save_interval: Optional[float] = None,
+                 summary: bool = True) -> None:
+        self.organizer: Organizer = organizer
+        self.interval: float = interval
+        self.debounce: float = debounce
+        self.save_interval: Optional[float] = save_interval
+        self.summary: bool = summary
+        self.lock = threading.RLock()
+        self.snapshot: dict[str, tuple[int, int, int]] = {}
+        self.pending: dict[str, tuple[int, int, float]] = {}
+        self.dir_mtime_ns: Optional[int] = None
+        self.last_save: float = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan(self) -> dict[str, tuple[int, int, int]]:
+        # the listing itself gives names and inodes, so entries already in the snapshot cost no syscall
+        snapshot = {}
+        with os.scandir(self.organizer.papers_loc) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith('.pdf'):
+                    continue
+                known = self.snapshot.get(entry.name)
+                if known is not None and known[2] == entry.inode():
+                    snapshot[entry.name] = known
+                elif entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        return snapshot
+
+    def poll(self) -> WatchEvents:
+        events = WatchEvents()
+        try:
+            dir_mtime_ns = os.stat(self.organizer.papers_loc).st_mtime_ns
+            if dir_mtime_ns != self.dir_mtime_ns:
+                # only recorded once every change of the listing went through, otherwise it is listed again next poll
+                if self._diff(self._scan(), events):
+                    self.dir_mtime_ns = dir_mtime_ns
+        except Exception as error:
+            events.errors.append(f'scanning {self.organizer.papers_loc} failed: {type(error).__name__}: {error}')
+        try:
+            self._ingest_pending(events)
+        except Exception as error:
+            events.errors.append(f'registering new pdfs failed: {type(error).__name__}: {error}')
+        try:
+            if self.save_interval is not None and time.monotonic() - self.last_save >= self.save_interval:
+                self.save()
+        except Exception as error:
+            events.errors.append(f'saving the collection failed: {type(error).__name__}: {error}')
+        if self.summary and events:
+            print(events)
+        return events
+
+    def _diff(self, snapshot: dict[str, tuple[int, int, int]], events: WatchEvents) -> bool:
+        # returns False when a registered pdf could not be loaded or removed; it is left out of the new
+        # snapshot (or kept in it) so that the next listing sees the same change again
+        complete = True
+        added = snapshot.keys() - self.snapshot.keys()
+        removed = self.snapshot.keys() - snapshot.keys()
+        # a rename keeps the inode, so it is matched up instead of being seen as a removal plus an addition
+        removed_inodes = {self.snapshot[name][2]: name for name in removed}
+        for name in sorted(added):
+            old_name = removed_inodes.get(snapshot[name][2])
+            if old_name is not None:
+                removed.discard(old_name)
+                events.renamed[old_name] = name
+                self.pending.pop(old_name, None)
+            match = registered_pattern.fullmatch(name)
+            if match is not None:
+                paper_id = int(match.group(1))
+                if paper_id not in self.organizer.paper_dict:
+                    try:
+                        with self.lock:
+                            self.organizer.add_paper(name, True, summary=False)
+                    except (OSError, ValueError) as error:
+                        events.errors.append(f'loading {name} failed: {type(error).__name__}: {error}')
+                        del snapshot[name]
+                        complete = False
+                        continue
+                    events.loaded.append(paper_id)
+            else:
+                size, mtime_ns, _ = snapshot[name]
+                self.pending[name] = (size, mtime_ns, time.monotonic())
+
+        for name in sorted(removed):
+            self.pending.pop(name, None)
+        for name in sorted(removed | set(events.renamed)):
+            match = registered_pattern.fullmatch(name)
+            if match is not None and int(match.group(1)) in self.organizer.paper_dict:
+                try:
+                    with self.lock:
+                        self.organizer.remove_paper(int(match.group(1)))
+                except (OSError, ValueError) as error:
+                    events.errors.append(f'removing paper {match.group(1)} failed: {type(error).__name__}: {error}')
+                    snapshot[name] = self.snapshot[name]
+                    complete = False
+                    continue
+                events.removed.append(int(match.group(1)))
+        self.snapshot = snapshot
+        return complete
+
+    def _ingest_pending(self, events: WatchEvents) -> None:
+        now = time.monotonic()
+        ready: dict[str, tuple[int, int]] = {}
+        for name, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(os.path.join(self.organizer.papers_loc, name))
+            except FileNotFoundError:
+                del self.pending[name]
+                continue
+            except OSError as error:
+                events.errors.append(f'checking {name} failed: {type(error).__name__}: {error}')
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                # still being written, restart the debounce window
+                self.pending[name] = (stat.st_size, stat.st_mtime_ns, now)
+                continue
+            if now - since < self.debounce:
+                continue
+            ready[name] = (size, mtime_ns)
+        if ready == {}:
+            return
+        # names leave pending only once the batch went through; if add_papers raises they are all retried
+        with self.lock:
+            ingest = self.organizer.add_papers(sorted(ready), summary=False, file_stats=ready)
+        for name in ready:
+            if name not in ingest.failed:
+                del self.pending[name]
+        events.added.update(ingest.added)
+        for name, paper_id in ingest.duplicates.items():
+            events.rejected[name] = f'{name} has the same content as paper {paper_id}.'
+        # pdfs that could not be renamed stay pending and are tried again next poll
+        for name, error in ingest.failed.items():
+            events.errors.append(f'registering {name} failed: {error}')
+
+    def save(self) -> None:
+        with self.lock:
+            self.organizer.data_save()
+        self.last_save = time.monotonic()
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name='paper-organizer-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Watch a collection folder and register new pdfs as they appear.')
+    parser.add_argument('collection_loc')
+    parser.add_argument('--interval', type=float, default=2.0)
+    parser.add_argument('--debounce', type=float, default=1.0)
+    parser.add_argument('--save-interval', type=float, default=60.0)
+    parser.add_argument('--lazy', action='store_true')
+    args = parser.parse_args()
+
+    organizer = Organizer.open(args.collection_loc, lazy=args.lazy)
+    watcher = Watcher(organizer, interval=args.interval, debounce=args.debounce, save_interval=args.save_interval)
+
+    def shutdown(signum, frame):
+        watcher.stop()
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    print(f'Watching {organizer.papers_loc} every {args.interval}s. Press Ctrl+C to stop.')
+    watcher.run_forever()
+    # saves and leaves a fresh snapshot, so the next start does not rescan the folder
+    organizer.save_snapshot()
+    print('Saved the collection, watch stopped.')
+
+
+if __name__ == '__main__':
+    main()